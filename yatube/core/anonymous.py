@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import parse_http_date_safe
+
+SAFE_METHODS = ('GET', 'HEAD')
+# Заголовки тела, которых не должно быть в ответе 304.
+ENTITY_HEADERS = ('Content-Type', 'Content-Length')
+
+_lock = threading.Lock()
+# Адрес -> (срок, статус, заголовки, тело), в порядке использования.
+_pages = OrderedDict()
+
+
+def is_anonymous(request):
+    """Запрос без cookie сессии: такой клиент точно не вошёл на сайт,
+    и чтобы это узнать, сессию читать не нужно."""
+    return (request.method in SAFE_METHODS
+            and settings.SESSION_COOKIE_NAME not in request.COOKIES)
+
+
+def public_for_anonymous(view):
+    """Страница, одинаковая для всех анонимных посетителей.
+
+    Анонимному запросу подставляется AnonymousUser вместо ленивого
+    пользователя из сессии: сессия не читается, cookie не ставятся, и
+    ответ помечается Cache-Control: public, поэтому его может отдавать
+    прокси или AnonymousCacheMiddleware. Ответы вошедшим пользователям
+    помечаются private.
+
+    Публичный ответ всё равно получает Vary: Cookie: посетители без
+    cookie делят в прокси одну копию, а запрос с cookie сессии никогда
+    не получит страницу, собранную для анонима, как бы ни был настроен
+    прокси. Если представление всё же прочитало сессию, ответ остаётся
+    private.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        anonymous = is_anonymous(request)
+        if anonymous:
+            request.user = AnonymousUser()
+        response = view(request, *args, **kwargs)
+        if anonymous and not request.session.accessed:
+            patch_cache_control(
+                response, public=True,
+                max_age=settings.ANONYMOUS_CACHE_TIMEOUT)
+        else:
+            patch_cache_control(response, private=True)
+        patch_vary_headers(response, ('Cookie',))
+        return response
+    return wrapper
+
+
+def is_cacheable(response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and 'public' in response.get('Cache-Control', '')
+    )
+
+
+def get_page(request):
+    """Сохранённый ответ на анонимный запрос или None.
+
+    На условный запрос с совпавшим ETag или Last-Modified отвечает 304.
+    """
+    key = request.get_full_path()
+    with _lock:
+        page = _pages.get(key)
+        if page is None:
+            return None
+        expires, status, headers, content = page
+        if expires < time.monotonic():
+            del _pages[key]
+            return None
+        _pages.move_to_end(key)
+    response = get_conditional_response(
+        request,
+        etag=headers.get('ETag'),
+        last_modified=parse_http_date_safe(headers.get('Last-Modified', '')),
+    )
+    if response is None:
+        response = HttpResponse(content, status=status)
+    for name, value in headers.items():
+        if response.status_code == 200 or name not in ENTITY_HEADERS:
+            response[name] = value
+    return response
+
+
+def store_page(request, response):
+    if not is_cacheable(response):
+        return
+    headers = {name: value for name, value in response.items()}
+    page = (time.monotonic() + settings.ANONYMOUS_CACHE_TIMEOUT,
+            response.status_code, headers, response.content)
+    key = request.get_full_path()
+    with _lock:
+        _pages[key] = page
+        _pages.move_to_end(key)
+        while len(_pages) > settings.ANONYMOUS_CACHE_SIZE:
+            _pages.popitem(last=False)
+
+
+def clear():
+    with _lock:
+        _pages.clear()
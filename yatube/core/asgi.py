@@ -0,0 +1,167 @@
+import asyncio
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+
+# Сколько готовых частей потокового ответа ждут медленного клиента.
+STREAM_BUFFER = 8
+
+
+def build_environ(scope, body):
+    """WSGI environ для HTTP-запроса ASGI."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        # WSGI передаёт байты пути строкой в latin-1.
+        'PATH_INFO': scope['path'].encode().decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'REMOTE_ADDR': client[0],
+        'SERVER_PROTOCOL': 'HTTP/' + scope.get('http_version', '1.1'),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = 'HTTP_' + name
+        value = value.decode('latin-1')
+        if name in environ:
+            value = environ[name] + ',' + value
+        environ[name] = value
+    return environ
+
+
+class ASGIHandler:
+    """ASGI-приложение поверх WSGIHandler Django 2.2.
+
+    Чтение тела запроса и отправка ответа идут в цикле событий, поэтому
+    медленные клиенты не занимают потоки. Сам запрос — middleware,
+    представление, обращения к БД и рендеринг — выполняется в пуле из
+    ASGI_THREADS потоков: Django 2.2 не умеет асинхронных представлений,
+    и его соединения с БД привязаны к потоку.
+    """
+
+    def __init__(self, executor=None):
+        self.wsgi = WSGIHandler()
+        self.executor = executor or ThreadPoolExecutor(
+            settings.ASGI_THREADS, thread_name_prefix='asgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f'Неподдерживаемый тип: {scope["type"]}')
+        body = await self.read_body(receive)
+        if body is None:
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            start, response = await loop.run_in_executor(
+                self.executor, self.handle, build_environ(scope, body))
+        finally:
+            body.close()
+        await send(start)
+        if getattr(response, 'streaming', False):
+            await self.send_stream(loop, response, send)
+        else:
+            await send({'type': 'http.response.body', 'body': response})
+
+    async def send_stream(self, loop, response, send):
+        chunks = asyncio.Queue(STREAM_BUFFER)
+        cancelled = threading.Event()
+        streamed = loop.run_in_executor(
+            self.executor, self.stream, loop, response, chunks, cancelled)
+        try:
+            while True:
+                chunk = await chunks.get()
+                if chunk is None:
+                    break
+                await send({'type': 'http.response.body', 'body': chunk,
+                            'more_body': True})
+            await send({'type': 'http.response.body'})
+        except BaseException:
+            # Клиент отключился: останавливаем поток и освобождаем очередь.
+            cancelled.set()
+            while await chunks.get() is not None:
+                pass
+            raise
+        finally:
+            await streamed
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, receive):
+        """Тело запроса; большое тело уходит во временный файл.
+        None, если клиент отключился."""
+        body = tempfile.SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return None
+            body.write(message.get('body', b''))
+            if not message.get('more_body', False):
+                body.seek(0)
+                return body
+
+    def handle(self, environ):
+        """Выполняется в пуле: сообщение http.response.start и тело
+        ответа, а для потокового ответа — сам ответ."""
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers
+            ]
+
+        response = self.wsgi(environ, start_response)
+        start = {'type': 'http.response.start', **started}
+        if getattr(response, 'streaming', False):
+            return start, response
+        try:
+            return start, b''.join(response)
+        finally:
+            response.close()
+
+    def stream(self, loop, response, chunks, cancelled):
+        """Выполняется в пуле: части потокового ответа в очередь chunks.
+        Пока клиент не дочитал, поток занят — как и при WSGI."""
+        try:
+            for chunk in response:
+                if cancelled.is_set():
+                    break
+                asyncio.run_coroutine_threadsafe(
+                    chunks.put(chunk), loop).result()
+        finally:
+            response.close()
+            asyncio.run_coroutine_threadsafe(chunks.put(None), loop).result()
+
+
+def get_asgi_application():
+    django.setup(set_prefix=False)
+    return ASGIHandler()
@@ -0,0 +1,67 @@
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+_lock = threading.Lock()
+# id пользователя -> (срок, версия, алиас БД, значения полей модели).
+_users = {}
+
+
+def version_key(user_id):
+    return f'auth-user-version:{user_id}'
+
+
+def get_version(user_id):
+    return caches[settings.AUTH_USER_CACHE_ALIAS].get(version_key(user_id))
+
+
+def forget(user_id):
+    """Сбрасывает пользователя во всех процессах: здесь — сразу, в
+    остальных — сменой версии в общем кэше AUTH_USER_CACHE_ALIAS."""
+    with _lock:
+        _users.pop(user_id, None)
+    caches[settings.AUTH_USER_CACHE_ALIAS].set(
+        version_key(user_id), uuid.uuid4().hex, None)
+
+
+def clear():
+    with _lock:
+        _users.clear()
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который держит пользователей сессий в памяти
+    процесса AUTH_USER_CACHE_TIMEOUT секунд.
+
+    Сохранение, удаление и выход пользователя меняют его версию в общем
+    для процессов кэше AUTH_USER_CACHE_ALIAS, и каждый процесс при
+    следующем запросе перечитывает пользователя из базы. Изменения в
+    обход сигналов (update() по queryset, правка базы вручную)
+    подхватываются по истечении срока. Каждый запрос получает свой
+    объект: из кэша берутся лишь значения полей.
+    """
+
+    def get_user(self, user_id):
+        UserModel = get_user_model()
+        user_id = UserModel._meta.pk.to_python(user_id)
+        fields = [field.attname for field in UserModel._meta.concrete_fields]
+        version = get_version(user_id)
+        with _lock:
+            entry = _users.get(user_id)
+        if (entry is not None and entry[0] > time.monotonic()
+                and entry[1] == version):
+            _, _, db, values = entry
+            return UserModel.from_db(db, fields, values)
+        user = super().get_user(user_id)
+        if user is not None:
+            values = [getattr(user, field) for field in fields]
+            with _lock:
+                _users[user_id] = (
+                    time.monotonic() + settings.AUTH_USER_CACHE_TIMEOUT,
+                    version, user._state.db, values)
+        return user
@@ -0,0 +1,146 @@
+import functools
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, OperationalError, connections, transaction
+
+PRIMARY = 'default'
+# Таблица в файле реплики, куда sync_replicas пишет время начала копии.
+POSITION_TABLE = 'replica_position'
+# Сколько секунд процесс помнит позицию реплики, прежде чем перечитать.
+POSITION_TTL = 1.0
+READ_STATEMENTS = ('SELECT', 'PRAGMA', 'EXPLAIN')
+
+_local = threading.local()
+_lock = threading.Lock()
+# Алиас реплики -> (время проверки, позиция или None).
+_positions = {}
+
+
+def reset():
+    """Начало запроса: записей не было, свежесть реплик не требуется."""
+    _local.written = False
+    _local.required = 0.0
+
+
+def note_write():
+    """Запись в основную базу: до конца запроса чтения идут туда же."""
+    _local.written = True
+
+
+def has_written():
+    return getattr(_local, 'written', False)
+
+
+def require_position(position):
+    """Читать только с реплик, скопированных не раньше position
+    (время по часам сервера)."""
+    _local.required = position
+
+
+def track_writes(execute, sql, params, many, context):
+    """execute_wrapper основной базы: отмечает всё, что не чтение."""
+    if not sql.lstrip().upper().startswith(READ_STATEMENTS):
+        note_write()
+    return execute(sql, params, many, context)
+
+
+def read_position(alias):
+    """Время начала последней копии реплики или None, если реплика
+    ни разу не синхронизировалась."""
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute(f'SELECT synced_at FROM {POSITION_TABLE}')
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    return row[0] if row else None
+
+
+def replica_position(alias):
+    now = time.monotonic()
+    with _lock:
+        entry = _positions.get(alias)
+    if entry is not None and entry[0] + POSITION_TTL > now:
+        return entry[1]
+    position = read_position(alias)
+    with _lock:
+        _positions[alias] = (now, position)
+    return position
+
+
+def forget_positions():
+    with _lock:
+        _positions.clear()
+
+
+class ReplicaRouter:
+    """Чтение — со случайной реплики из DATABASE_REPLICAS, запись —
+    в основную базу.
+
+    Реплика годится для чтения, если она скопирована не раньше
+    REPLICA_MAX_LAG секунд назад и не раньше последней записи клиента
+    (PrimaryPinMiddleware передаёт её время из cookie). Иначе, а также
+    после записи в текущем запросе, чтение идёт в основную базу.
+    """
+
+    def db_for_read(self, model, **hints):
+        if has_written() or not settings.DATABASE_REPLICAS:
+            return PRIMARY
+        required = max(getattr(_local, 'required', 0.0),
+                       time.time() - settings.REPLICA_MAX_LAG)
+        fresh = []
+        for alias in settings.DATABASE_REPLICAS:
+            position = replica_position(alias)
+            if position is not None and position >= required:
+                fresh.append(alias)
+        return random.choice(fresh) if fresh else PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная база.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+def apply_pragmas(connection):
+    """Настраивает новое соединение SQLite по SQLITE_PRAGMAS."""
+    if connection.vendor != 'sqlite' or not settings.SQLITE_PRAGMAS:
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def is_locked(error):
+    return 'database is locked' in str(error)
+
+
+def retry_on_locked(func):
+    """Повторяет запись, если SQLite занята другим писателем.
+
+    busy_timeout не помогает, когда транзакция, начатая чтением,
+    переходит к записи: SQLite сразу отвечает «database is locked».
+    Каждая попытка выполняется в своей транзакции, поэтому неудачная
+    не оставляет частичных изменений.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        delay = settings.DB_WRITE_RETRY_DELAY
+        for attempt in range(settings.DB_WRITE_RETRIES + 1):
+            try:
+                with transaction.atomic(using=PRIMARY):
+                    return func(*args, **kwargs)
+            except OperationalError as error:
+                if (not is_locked(error)
+                        or attempt == settings.DB_WRITE_RETRIES):
+                    raise
+            time.sleep(delay)
+            delay *= 2
+    return wrapper
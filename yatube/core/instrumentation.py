@@ -0,0 +1,212 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template
+from django.template.loaders.base import Loader as BaseLoader
+
+MS_BOUNDS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+METRIC_BOUNDS = {
+    'total_ms': MS_BOUNDS,
+    'db_ms': MS_BOUNDS,
+    'template_ms': MS_BOUNDS,
+    'queries': (1, 2, 5, 10, 20, 50, 100),
+    'bytes': (1024, 10 * 1024, 100 * 1024, 1024 * 1024),
+}
+
+_local = threading.local()
+
+
+class RequestStats:
+    """Работа, выполненная при обработке одного запроса."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        # Имя шаблона -> [число рендерингов, время с вложенными шаблонами].
+        self.templates = defaultdict(lambda: [0, 0.0])
+
+    def __call__(self, execute, sql, params, many, context):
+        # Обёртка connection.execute_wrapper: время каждого SQL-запроса.
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+    def add_template(self, name, seconds):
+        timing = self.templates[name]
+        timing[0] += 1
+        timing[1] += seconds
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+
+def current():
+    return getattr(_local, 'stats', None)
+
+
+def activate(stats):
+    _local.stats = stats
+
+
+def deactivate():
+    _local.stats = None
+
+
+class InstrumentedTemplate(Template):
+    def render(self, context=None, request=None):
+        stats = current()
+        if stats is None:
+            return super().render(context, request)
+        # Вложенный рендеринг уже учтён во внешнем.
+        stats.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.template_depth -= 1
+            if not stats.template_depth:
+                stats.template_time += time.perf_counter() - started
+
+
+class TimedTemplate:
+    """Шаблон, отданный TimedLoader: время его рендеринга, в том числе
+    через {% include %} и {% extends %}, учитывается под его именем."""
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def timed(self, render, context):
+        stats = current()
+        if stats is None:
+            return render(context)
+        started = time.perf_counter()
+        try:
+            return render(context)
+        finally:
+            stats.add_template(
+                self.template.name, time.perf_counter() - started)
+
+    def render(self, context):
+        return self.timed(self.template.render, context)
+
+    def _render(self, context):
+        # Так ExtendsNode рендерит родительский шаблон.
+        return self.timed(self.template._render, context)
+
+
+class TimedLoader(BaseLoader):
+    """Обёртка над загрузчиками, как django.template.loaders.cached:
+    каждый найденный шаблон замеряется при рендеринге."""
+
+    def __init__(self, engine, loaders):
+        self.loaders = engine.get_template_loaders(loaders)
+        super().__init__(engine)
+
+    def get_template(self, template_name, skip=None):
+        tried = []
+        for loader in self.loaders:
+            try:
+                return TimedTemplate(loader.get_template(template_name, skip))
+            except TemplateDoesNotExist as error:
+                tried.extend(error.tried)
+        raise TemplateDoesNotExist(template_name, tried=tried)
+
+    def get_template_sources(self, template_name):
+        for loader in self.loaders:
+            yield from loader.get_template_sources(template_name)
+
+    def reset(self):
+        for loader in self.loaders:
+            if hasattr(loader, 'reset'):
+                loader.reset()
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """Шаблонизатор Django, замеряющий время рендеринга в запросах,
+    выбранных RequestStatsMiddleware."""
+
+    def from_string(self, template_code):
+        template = super().from_string(template_code)
+        return InstrumentedTemplate(template.template, self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return InstrumentedTemplate(template.template, self)
+
+
+class Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0
+
+    def add(self, value):
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def as_dict(self):
+        labels = [f'le_{bound}' for bound in self.bounds] + ['inf']
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 3),
+            'buckets': dict(zip(labels, self.buckets)),
+        }
+
+
+class Registry:
+    """Гистограммы метрик по именам URL, общие для процесса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.views = defaultdict(lambda: {
+            name: Histogram(bounds) for name, bounds in METRIC_BOUNDS.items()
+        })
+        self.templates = defaultdict(
+            lambda: defaultdict(lambda: Histogram(MS_BOUNDS)))
+
+    def add(self, view_name, values, templates=None):
+        with self.lock:
+            histograms = self.views[view_name]
+            for name, value in values.items():
+                if value is not None:
+                    histograms[name].add(value)
+            for name, value in (templates or {}).items():
+                self.templates[view_name][name].add(value)
+
+    def as_dict(self):
+        with self.lock:
+            return {
+                view_name: {
+                    **{
+                        name: histogram.as_dict()
+                        for name, histogram in histograms.items()
+                    },
+                    'templates': {
+                        name: histogram.as_dict()
+                        for name, histogram
+                        in self.templates[view_name].items()
+                    },
+                }
+                for view_name, histograms in self.views.items()
+            }
+
+
+registry = Registry()
@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.db import POSITION_TABLE, PRIMARY
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу SQLite в файлы реплик из '
+            'DATABASE_REPLICAS через backup API SQLite и записывает в '
+            'каждую время начала копии. Запускать чаще, чем раз в '
+            'REPLICA_MAX_LAG секунд, иначе чтения уйдут в основную базу.')
+
+    def handle(self, **options):
+        source = connections[PRIMARY]
+        if source.vendor != 'sqlite':
+            raise CommandError('Команда работает только с SQLite.')
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError(
+                'Реплики не настроены: задайте YATUBE_REPLICAS.')
+        source.ensure_connection()
+        for alias in settings.DATABASE_REPLICAS:
+            replica = connections[alias]
+            replica.close()
+            replica.ensure_connection()
+            # Всё, что зафиксировано до этого момента, попадёт в копию.
+            synced_at = time.time()
+            source.connection.backup(replica.connection)
+            with replica.cursor() as cursor:
+                cursor.execute(
+                    f'CREATE TABLE {POSITION_TABLE} (synced_at REAL)')
+                cursor.execute(
+                    f'INSERT INTO {POSITION_TABLE} VALUES (%s)', [synced_at])
+            replica.close()
+            self.stdout.write(f'{alias}: {replica.settings_dict["NAME"]}')
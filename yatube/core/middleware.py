@@ -0,0 +1,141 @@
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import anonymous, db, instrumentation
+
+
+def is_staff(request):
+    user = getattr(request, 'user', None)
+    return user is not None and user.is_staff
+
+
+def server_timing(stats, templates, total_time):
+    return ', '.join((
+        f'db;dur={stats.db_time * 1000:.1f};'
+        f'desc="{stats.queries} queries"',
+        f'tpl;dur={stats.template_time * 1000:.1f}',
+        *(f'tpl-{number};dur={seconds * 1000:.1f};'
+          f'desc="{name} x{renders}"'
+          for number, (name, (renders, seconds))
+          in enumerate(templates, 1)),
+        f'total;dur={total_time * 1000:.1f}',
+    ))
+
+
+class RequestStatsMiddleware:
+    """Замеряет число и время SQL-запросов, время рендеринга шаблонов
+    и размер ответа для доли запросов REQUEST_STATS_SAMPLE_RATE.
+
+    Замеры копятся в гистограммах по именам URL (posts:index,
+    posts:profile, ...). Заголовок Server-Timing с ними, в том числе
+    со временем каждого шаблона вместе с вложенными, получают только
+    персонал и, при DEBUG, все: имена шаблонов посторонним не видны.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.REQUEST_STATS_SAMPLE_RATE:
+            return self.get_response(request)
+        stats = instrumentation.RequestStats()
+        instrumentation.activate(stats)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            instrumentation.deactivate()
+        total_time = stats.total_time
+        templates = sorted(
+            stats.templates.items(), key=lambda item: -item[1][1])
+        if settings.DEBUG or is_staff(request):
+            response['Server-Timing'] = server_timing(
+                stats, templates, total_time)
+        match = request.resolver_match
+        instrumentation.registry.add(
+            match.view_name if match else 'unresolved', {
+                'total_ms': total_time * 1000,
+                'db_ms': stats.db_time * 1000,
+                'template_ms': stats.template_time * 1000,
+                'queries': stats.queries,
+                'bytes': None if response.streaming else len(response.content),
+            }, {
+                name: seconds * 1000 for name, (_, seconds) in templates
+            })
+        return response
+
+
+class PrimaryPinMiddleware:
+    """Read-your-writes при отставании реплик.
+
+    Запросы к основной базе, кроме чтений, отмечаются db.track_writes;
+    после такой записи чтения до конца запроса идут в основную базу, а
+    клиент получает cookie со временем записи. Пока ни одна реплика не
+    скопирована позже этого времени, его чтения тоже идут в основную
+    базу. Реплики старше REPLICA_MAX_LAG секунд не читаются вовсе,
+    поэтому cookie живёт столько же.
+    """
+
+    cookie_name = 'pin_primary'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # Поток мог остаться с отметкой записи после работы вне запроса.
+        db.reset()
+        written_at = self.written_at(request)
+        if written_at:
+            db.require_position(written_at)
+        try:
+            with connections[db.PRIMARY].execute_wrapper(db.track_writes):
+                response = self.get_response(request)
+            written = db.has_written()
+        finally:
+            db.reset()
+        if written and settings.DATABASE_REPLICAS:
+            # Время берётся после ответа: все транзакции запроса уже
+            # зафиксированы, и копия, начатая позже, их содержит.
+            response.set_cookie(
+                self.cookie_name, repr(time.time()),
+                max_age=settings.REPLICA_MAX_LAG, httponly=True)
+        return response
+
+    def written_at(self, request):
+        try:
+            value = float(request.COOKIES.get(self.cookie_name, ''))
+        except ValueError:
+            return None
+        # Время из будущего закрепило бы клиента за основной базой.
+        return min(value, time.time())
+
+
+class AnonymousCacheMiddleware:
+    """Отдаёт анонимным посетителям сохранённые в памяти процесса
+    страницы, не вызывая ни сессий, ни представлений.
+
+    Сохраняются только ответы с Cache-Control: public без cookie
+    (см. anonymous.public_for_anonymous) на ANONYMOUS_CACHE_TIMEOUT
+    секунд; 0 отключает кэш. Запросы с cookie сессии сюда не попадают.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not (settings.ANONYMOUS_CACHE_TIMEOUT
+                and anonymous.is_anonymous(request)):
+            return self.get_response(request)
+        response = anonymous.get_page(request)
+        if response is not None:
+            response['X-Anonymous-Cache'] = 'HIT'
+            return response
+        response = self.get_response(request)
+        anonymous.store_page(request, response)
+        return response
@@ -0,0 +1,57 @@
+import os
+
+from django.conf import settings
+from django.forms import renderers
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.template.utils import get_app_template_dirs
+from django.utils.functional import cached_property
+
+
+def template_names(extensions=('.html',)):
+    """Имена всех шаблонов проекта и приложений."""
+    dirs = [
+        directory
+        for backend in settings.TEMPLATES
+        for directory in backend.get('DIRS', [])
+    ]
+    dirs.extend(get_app_template_dirs('templates'))
+    names = set()
+    for directory in dirs:
+        for root, _, files in os.walk(directory):
+            for file in files:
+                if file.endswith(extensions):
+                    path = os.path.join(root, file)
+                    names.add(os.path.relpath(path, directory).replace(
+                        os.sep, '/'))
+    return sorted(names)
+
+
+def warm_templates():
+    """Загружает и компилирует все шаблоны, чтобы кэширующий загрузчик
+    не делал этого на первых запросах. Возвращает число шаблонов."""
+    names = template_names()
+    for engine in engines.all():
+        if isinstance(engine, DjangoTemplates):
+            for name in names:
+                engine.get_template(name)
+    return len(names)
+
+
+class CachedFormRenderer(renderers.DjangoTemplates):
+    """Рендерер форм, который разбирает шаблоны виджетов один раз на
+    процесс и при DEBUG: это шаблоны самого Django, они не меняются."""
+
+    @cached_property
+    def engine(self):
+        return self.backend({
+            'APP_DIRS': False,
+            'DIRS': [renderers.ROOT / self.backend.app_dirname],
+            'NAME': 'djangoforms',
+            'OPTIONS': {
+                'loaders': [
+                    ('django.template.loaders.cached.Loader',
+                     settings.TEMPLATE_LOADERS),
+                ],
+            },
+        })
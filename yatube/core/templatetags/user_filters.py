@@ -1,8 +1,76 @@
+from collections import namedtuple
+
 from django import template
+from django.utils.html import conditional_escape, format_html
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language
 
 register = template.Library()
 
+FieldLayout = namedtuple('FieldLayout', 'name html_name attrs before after')
+
+# (класс формы, css, префикс, ...) -> [FieldLayout, ...]
+_layouts = {}
+
 
 @register.filter
 def addclass(field, css):
     return field.as_widget(attrs={'class': css})
+
+
+def field_layout(field, css):
+    """Неизменная часть разметки поля: атрибуты виджета, подпись
+    и подсказка."""
+    widget = field.field.widget
+    attrs = field.build_widget_attrs({'class': css})
+    if field.auto_id and 'id' not in widget.attrs:
+        attrs['id'] = field.auto_id
+    if field.is_hidden:
+        return FieldLayout(field.name, field.html_name, attrs, '', '')
+    required = field.field.required
+    before = format_html(
+        '<div class="form-group row my-3" aria-required="{}">'
+        '<label for="{}">{}{}</label><div>',
+        'true' if required else 'false',
+        field.id_for_label,
+        conditional_escape(field.label),
+        mark_safe('<span class="required text-danger">*</span>')
+        if required else '',
+    )
+    after = mark_safe('</div></div>')
+    if field.help_text:
+        after = format_html(
+            '<small id="{}-help" class="form-text text-muted">{}</small>{}',
+            field.id_for_label, mark_safe(field.help_text), after)
+    return FieldLayout(field.name, field.html_name, attrs, before, after)
+
+
+def form_layout(form, css):
+    """Разметка полей считается один раз на класс формы: поля формы
+    не должны меняться от экземпляра к экземпляру."""
+    key = (type(form), css, form.prefix, form.auto_id,
+           form.use_required_attribute, get_language())
+    layout = _layouts.get(key)
+    if layout is None:
+        layout = _layouts[key] = [
+            field_layout(form[name], css) for name in form.fields]
+    return layout
+
+
+@register.simple_tag
+def render_form(form, css='form-control'):
+    """Все поля формы с классом css у виджетов.
+
+    Вместо field|addclass для каждого поля: атрибуты виджетов, подписи
+    и подсказки берутся из form_layout, при рендеринге остаются только
+    значения полей.
+    """
+    parts = []
+    for layout in form_layout(form, css):
+        field = form[layout.name]
+        parts.append(layout.before)
+        parts.append(field.field.widget.render(
+            layout.html_name, field.value(), dict(layout.attrs),
+            form.renderer))
+        parts.append(layout.after)
+    return mark_safe(''.join(parts))
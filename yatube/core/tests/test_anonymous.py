@@ -0,0 +1,110 @@
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+from .. import anonymous
+
+User = get_user_model()
+
+
+class AnonymousPagesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_author = User.objects.create_user(username='user_author')
+        cls.group = Group.objects.create(
+            title='Тестовое название группы',
+            slug='test-slug',
+            description='Тестовое описание группы',
+        )
+        cls.post = Post.objects.create(
+            text='Текст поста', author=cls.user_author, group=cls.group)
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': cls.user_author.username}),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.pk}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        anonymous.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user_author)
+
+    def test_anonymous_pages_are_public(self):
+        """Анонимные страницы общие: без сессии и cookie, но с
+        Vary: Cookie, чтобы прокси не отдал их вошедшему."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertIn('public', response['Cache-Control'])
+                self.assertIn('Cookie', response['Vary'])
+                self.assertFalse(response.cookies)
+                self.assertContains(response, reverse('users:login'))
+
+    def test_user_pages_are_private(self):
+        """Страницы вошедшего пользователя не попадают в общий кэш."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertIn('private', response['Cache-Control'])
+                self.assertIn('Cookie', response['Vary'])
+                self.assertContains(response, reverse('users:logout'))
+
+    @override_settings(ANONYMOUS_CACHE_TIMEOUT=60)
+    def test_cache_middleware(self):
+        """Повторный анонимный запрос обслуживается без представления."""
+        url = reverse('posts:index')
+        first = self.guest_client.get(url)
+        with self.assertNumQueries(0):
+            second = self.guest_client.get(url)
+        self.assertEqual(second['X-Anonymous-Cache'], 'HIT')
+        self.assertEqual(second.content, first.content)
+        self.assertIn('max-age=60', second['Cache-Control'])
+        not_modified = self.guest_client.get(
+            url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        user_page = self.authorized_client.get(url)
+        self.assertFalse(user_page.has_header('X-Anonymous-Cache'))
+
+    @override_settings(ANONYMOUS_CACHE_TIMEOUT=60)
+    def test_cached_page_is_not_served_to_users(self):
+        """Сохранённая анонимная страница не достаётся вошедшему: ни
+        из кэша процесса, ни из прокси, который учитывает Vary."""
+        url = reverse('posts:index')
+        anonymous_page = self.guest_client.get(url)
+        self.guest_client.get(url)
+        self.assertIn('Cookie', anonymous_page['Vary'])
+        response = self.authorized_client.get(url)
+        self.assertFalse(response.has_header('X-Anonymous-Cache'))
+        self.assertContains(response, reverse('users:logout'))
+
+    def test_session_access_keeps_page_private(self):
+        """Ответ, для которого прочитана сессия, не помечается public."""
+        def view(request):
+            request.session.get('key')
+            return HttpResponse()
+
+        request = RequestFactory().get('/')
+        SessionMiddleware().process_request(request)
+        response = anonymous.public_for_anonymous(view)(request)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('Cookie', response['Vary'])
+
+    @override_settings(ANONYMOUS_CACHE_TIMEOUT=60)
+    def test_cache_is_cleared_on_post_save(self):
+        """Новая запись сразу видна анонимным посетителям."""
+        url = reverse('posts:index')
+        self.guest_client.get(url)
+        Post.objects.create(text='Свежая запись', author=self.user_author)
+        response = self.guest_client.get(url)
+        self.assertFalse(response.has_header('X-Anonymous-Cache'))
+        self.assertContains(response, 'Свежая запись')
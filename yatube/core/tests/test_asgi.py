@@ -0,0 +1,94 @@
+import asyncio
+from concurrent.futures import Executor, Future
+
+from django.contrib.auth import get_user_model
+from django.core.signals import request_started
+from django.db import close_old_connections
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Post
+
+from ..asgi import ASGIHandler
+
+User = get_user_model()
+
+
+class InlineExecutor(Executor):
+    """Выполняет запрос в потоке теста, где открыта его транзакция."""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+def call(app, scope, messages):
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return sent
+
+
+def http_scope(path, query=b''):
+    return {'type': 'http', 'method': 'GET', 'path': path,
+            'query_string': query, 'headers': [(b'host', b'testserver')]}
+
+
+class ASGIHandlerTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_author = User.objects.create_user(username='user_author')
+        cls.post = Post.objects.create(
+            text='Текст поста', author=cls.user_author)
+
+    def setUp(self):
+        # Как и тестовый клиент, не даём запросу закрыть соединение теста.
+        request_started.disconnect(close_old_connections)
+        self.addCleanup(request_started.connect, close_old_connections)
+        self.app = ASGIHandler(InlineExecutor())
+
+    def test_get(self):
+        """Страница отдаётся через ASGI с заголовками и телом."""
+        start, body = call(self.app, http_scope(reverse('posts:index')),
+                           [{'type': 'http.request'}])
+        self.assertEqual(start['type'], 'http.response.start')
+        self.assertEqual(start['status'], 200)
+        self.assertIn(b'content-type', dict(start['headers']))
+        self.assertIn(self.post.text, body['body'].decode())
+
+    def test_query_string_and_not_found(self):
+        """Строка запроса доходит до представления, 404 — как в WSGI."""
+        cases = (
+            (http_scope(reverse('posts:search'), 'q=Текст'.encode()), 200,
+             '<mark>Текст</mark> поста'),
+            (http_scope('/unexisting_page/'), 404, ''),
+        )
+        for scope, status, content in cases:
+            with self.subTest(path=scope['path']):
+                start, body = call(
+                    self.app, scope, [{'type': 'http.request'}])
+                self.assertEqual(start['status'], status)
+                self.assertIn(content, body['body'].decode())
+
+    def test_disconnect_before_body(self):
+        """Клиент ушёл, не отправив тело: ответа нет."""
+        scope = dict(http_scope(reverse('posts:index')), method='POST')
+        sent = call(self.app, scope, [
+            {'type': 'http.request', 'body': b'a', 'more_body': True},
+            {'type': 'http.disconnect'},
+        ])
+        self.assertEqual(sent, [])
+
+    def test_lifespan(self):
+        sent = call(self.app, {'type': 'lifespan'}, [
+            {'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}])
+        self.assertEqual([message['type'] for message in sent], [
+            'lifespan.startup.complete', 'lifespan.shutdown.complete'])
@@ -0,0 +1,100 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import auth
+
+User = get_user_model()
+
+
+class CachedModelBackendTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='user_author', password='Old-password-42')
+
+    def setUp(self):
+        auth.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def identity_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(url)
+        return response, [
+            query['sql'] for query in queries
+            if 'django_session' in query['sql']
+            or 'FROM "auth_user"' in query['sql']
+        ]
+
+    def test_identity_costs_no_queries(self):
+        """Сессия и пользователь читаются без запросов к базе."""
+        url = reverse('posts:follow_index')
+        self.authorized_client.get(url)
+        response, queries = self.identity_queries(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['user'], self.user)
+        self.assertEqual(queries, [])
+
+    def test_password_change_logs_out_other_sessions(self):
+        """Смена пароля сбрасывает кэш, и старая сессия перестаёт
+        действовать."""
+        url = reverse('posts:follow_index')
+        self.authorized_client.get(url)
+        self.user.set_password('New-password-42')
+        self.user.save()
+        response, queries = self.identity_queries(url)
+        self.assertNotEqual(queries, [])
+        self.assertRedirects(
+            response, f'{reverse("users:login")}?next={url}')
+
+    def test_change_in_another_process_is_seen(self):
+        """Деактивация в другом процессе видна без ожидания срока:
+        процесс узнаёт о ней по версии в общем кэше."""
+        url = reverse('posts:follow_index')
+        self.authorized_client.get(url)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        response, _ = self.identity_queries(url)
+        self.assertEqual(response.status_code, 200)
+        caches[settings.AUTH_USER_CACHE_ALIAS].set(
+            auth.version_key(self.user.pk), 'другой процесс')
+        response, queries = self.identity_queries(url)
+        self.assertNotEqual(queries, [])
+        self.assertRedirects(
+            response, f'{reverse("users:login")}?next={url}')
+
+    @override_settings(AUTH_USER_CACHE_TIMEOUT=0)
+    def test_changes_bypassing_signals_expire(self):
+        """Изменения в обход сигналов видны по истечении срока."""
+        url = reverse('posts:follow_index')
+        self.authorized_client.get(url)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        response, _ = self.identity_queries(url)
+        self.assertEqual(response.status_code, 302)
+
+    def test_logout_forgets_user(self):
+        """Выход убирает пользователя из кэша."""
+        self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertIn(self.user.pk, auth._users)
+        self.authorized_client.get(reverse('users:logout'))
+        self.assertNotIn(self.user.pk, auth._users)
+
+    def test_signup(self):
+        """Новый пользователь входит без устаревших данных в кэше."""
+        client = Client()
+        client.post(reverse('users:signup'), {
+            'username': 'newcomer',
+            'password1': 'Secret-password-42',
+            'password2': 'Secret-password-42',
+        })
+        newcomer = User.objects.get(username='newcomer')
+        self.assertNotIn(newcomer.pk, auth._users)
+        self.assertTrue(client.login(
+            username='newcomer', password='Secret-password-42'))
+        response = client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['user'], newcomer)
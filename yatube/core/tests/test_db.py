@@ -0,0 +1,146 @@
+import time
+from unittest import mock
+
+from django.db import OperationalError, connection
+from django.http import HttpResponse
+from django.test import (RequestFactory, SimpleTestCase, TestCase,
+                         override_settings)
+
+from posts.models import Group
+
+from .. import db
+from ..middleware import PrimaryPinMiddleware
+
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'],
+                   REPLICA_MAX_LAG=60)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = db.ReplicaRouter()
+        self.positions = {
+            'replica1': time.time(), 'replica2': time.time() - 30}
+        patcher = mock.patch.object(
+            db, 'replica_position', side_effect=self.positions.get)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        db.reset()
+        self.addCleanup(db.reset)
+
+    def reads(self):
+        return {self.router.db_for_read(None) for _ in range(50)}
+
+    def test_reads_go_to_replicas_and_writes_to_primary(self):
+        """Чтение идёт на реплики, запись — в основную базу."""
+        self.assertEqual(self.reads(), {'replica1', 'replica2'})
+        self.assertEqual(self.router.db_for_write(None), db.PRIMARY)
+        self.assertFalse(db.has_written())
+
+    def test_reads_after_write_stick_to_primary(self):
+        """После записи чтения в том же запросе идут в основную базу."""
+        db.note_write()
+        self.assertEqual(self.router.db_for_read(None), db.PRIMARY)
+
+    def test_reads_wait_for_replica_position(self):
+        """Реплика, скопированная до записи клиента, не читается."""
+        db.require_position(time.time() - 10)
+        self.assertEqual(self.reads(), {'replica1'})
+        db.require_position(time.time() + 1)
+        self.assertEqual(self.reads(), {db.PRIMARY})
+
+    @override_settings(REPLICA_MAX_LAG=10)
+    def test_stale_replicas_are_skipped(self):
+        """Отставшие и ни разу не скопированные реплики не читаются."""
+        self.assertEqual(self.reads(), {'replica1'})
+        self.positions['replica1'] = None
+        self.assertEqual(self.reads(), {db.PRIMARY})
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        """Без реплик всё читается из основной базы."""
+        self.assertEqual(self.router.db_for_read(None), db.PRIMARY)
+
+    def test_migrations_only_on_primary(self):
+        self.assertTrue(self.router.allow_migrate(db.PRIMARY, 'posts'))
+        self.assertFalse(self.router.allow_migrate('replica1', 'posts'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], REPLICA_MAX_LAG=60)
+class PrimaryPinMiddlewareTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.seen = {}
+
+        def get_response(request):
+            if request.method == 'POST':
+                Group.objects.create(title='Группа', slug='group')
+            self.seen['written'] = db.has_written()
+            self.seen['required'] = getattr(db._local, 'required', 0.0)
+            return HttpResponse()
+
+        self.middleware = PrimaryPinMiddleware(get_response)
+
+    def test_write_pins_following_requests(self):
+        """Запись отмечается по SQL и передаёт её время клиенту."""
+        before = time.time()
+        response = self.middleware(self.factory.post('/create/'))
+        self.assertTrue(self.seen['written'])
+        self.assertFalse(db.has_written())
+        cookie = response.cookies[PrimaryPinMiddleware.cookie_name]
+        self.assertEqual(cookie['max-age'], 60)
+        self.assertGreaterEqual(float(cookie.value), before)
+        request = self.factory.get('/profile/user/')
+        request.COOKIES[PrimaryPinMiddleware.cookie_name] = cookie.value
+        self.middleware(request)
+        self.assertFalse(self.seen['written'])
+        self.assertEqual(self.seen['required'], float(cookie.value))
+
+    def test_plain_reads_use_replicas(self):
+        """Обычный GET не требует свежей реплики и не ставит cookie."""
+        db.note_write()
+        request = self.factory.get('/')
+        request.COOKIES[PrimaryPinMiddleware.cookie_name] = 'мусор'
+        response = self.middleware(request)
+        self.assertFalse(self.seen['written'])
+        self.assertEqual(self.seen['required'], 0.0)
+        self.assertNotIn(PrimaryPinMiddleware.cookie_name, response.cookies)
+
+
+class SqliteTuningTests(TestCase):
+    @override_settings(SQLITE_PRAGMAS={'cache_size': -4096})
+    def test_pragmas_applied_to_connection(self):
+        """PRAGMA из настроек применяются к соединению."""
+        db.apply_pragmas(connection)
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -4096)
+
+    @override_settings(DB_WRITE_RETRIES=2, DB_WRITE_RETRY_DELAY=0)
+    def test_locked_writes_are_retried(self):
+        """Запись повторяется, пока база занята, но не бесконечно."""
+        calls = []
+
+        @db.retry_on_locked
+        def write(fails):
+            calls.append(1)
+            if len(calls) <= fails:
+                raise OperationalError('database is locked')
+            return 'ok'
+
+        self.assertEqual(write(2), 'ok')
+        self.assertEqual(len(calls), 3)
+        calls.clear()
+        with self.assertRaises(OperationalError):
+            write(3)
+        self.assertEqual(len(calls), 3)
+
+    def test_other_errors_are_not_retried(self):
+        calls = []
+
+        @db.retry_on_locked
+        def write():
+            calls.append(1)
+            raise OperationalError('no such table: posts_post')
+
+        with self.assertRaises(OperationalError):
+            write()
+        self.assertEqual(len(calls), 1)
@@ -0,0 +1,94 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from ..instrumentation import registry
+
+User = get_user_model()
+
+
+@override_settings(REQUEST_STATS_SAMPLE_RATE=1.0)
+class RequestStatsMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_author = User.objects.create_user(username='user_author')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.post = Post.objects.create(
+            text='Текст поста', author=cls.user_author)
+
+    def setUp(self):
+        registry.clear()
+        self.guest_client = Client()
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+
+    def test_server_timing_header(self):
+        """Ответ персоналу содержит замеры БД, шаблонов и общего
+        времени."""
+        response = self.staff_client.get(reverse('posts:index'))
+        timing = response['Server-Timing']
+        for metric in ('db;dur=', 'tpl;dur=', 'total;dur=', 'queries"'):
+            with self.subTest(metric=metric):
+                self.assertIn(metric, timing)
+
+    def test_stats_are_grouped_by_url_name(self):
+        """Гистограммы собираются по имени URL и доступны персоналу."""
+        self.guest_client.get(reverse('posts:index'))
+        self.guest_client.get(reverse('posts:index'))
+        self.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}))
+        stats = self.staff_client.get(reverse('request_stats')).json()
+        self.assertEqual(stats['posts:index']['total_ms']['count'], 2)
+        self.assertGreater(stats['posts:index']['queries']['sum'], 0)
+        self.assertGreater(stats['posts:index']['template_ms']['sum'], 0)
+        self.assertEqual(stats['posts:post_detail']['bytes']['count'], 1)
+
+    def test_template_breakdown(self):
+        """Время каждого шаблона, включая подключённые в цикле."""
+        cache.clear()
+        response = self.staff_client.get(reverse('posts:index'))
+        timing = response['Server-Timing']
+        for name in ('posts/index.html', 'base.html',
+                     'posts/includes/post_for_list.html x1'):
+            with self.subTest(template=name):
+                self.assertIn(name, timing)
+        stats = self.staff_client.get(reverse('request_stats')).json()
+        templates = stats['posts:index']['templates']
+        self.assertEqual(
+            templates['posts/includes/post_for_list.html']['count'], 1)
+
+    def test_server_timing_is_hidden_from_others(self):
+        """Посетители и пользователи не видят Server-Timing вне DEBUG,
+        но их запросы замеряются."""
+        user_client = Client()
+        user_client.force_login(self.user_author)
+        for client in (self.guest_client, user_client):
+            response = client.get(reverse('posts:index'))
+            self.assertFalse(response.has_header('Server-Timing'))
+        with self.settings(DEBUG=True):
+            response = self.guest_client.get(reverse('posts:index'))
+        self.assertIn('total;dur=', response['Server-Timing'])
+        stats = self.staff_client.get(reverse('request_stats')).json()
+        self.assertEqual(stats['posts:index']['total_ms']['count'], 3)
+
+    def test_stats_endpoint_is_staff_only(self):
+        """Статистика недоступна никому, кроме персонала, в том числе
+        запросам с локального адреса."""
+        url = reverse('request_stats')
+        response = self.guest_client.get(url, REMOTE_ADDR='127.0.0.1')
+        self.assertRedirects(
+            response, f'{reverse("admin:login")}?next={url}')
+        user_client = Client()
+        user_client.force_login(self.user_author)
+        self.assertEqual(user_client.get(url).status_code, 302)
+
+    @override_settings(REQUEST_STATS_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_measured(self):
+        """Запросы вне выборки не замеряются."""
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(registry.as_dict(), {})
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.template import engines
+from django.test import SimpleTestCase, override_settings
+
+from ..templates import template_names, warm_templates
+
+CACHED_TEMPLATES = [{
+    **settings.TEMPLATES[0],
+    'OPTIONS': {
+        **settings.TEMPLATES[0]['OPTIONS'],
+        'loaders': [
+            ('core.instrumentation.TimedLoader', [
+                ('django.template.loaders.cached.Loader',
+                 settings.TEMPLATE_LOADERS),
+            ]),
+        ],
+    },
+}]
+
+
+class WarmTemplatesTests(SimpleTestCase):
+    def test_template_names(self):
+        """Шаблоны проекта и приложений находятся по относительным именам."""
+        names = template_names()
+        for name in ('base.html', 'posts/includes/post_for_list.html',
+                     'admin/base.html'):
+            with self.subTest(name=name):
+                self.assertIn(name, names)
+
+    @override_settings(TEMPLATES=CACHED_TEMPLATES)
+    def test_warm_fills_cached_loader(self):
+        """После прогрева шаблоны берутся из кэша загрузчика."""
+        cached = engines.all()[0].engine.template_loaders[0].loaders[0]
+        self.assertEqual(cached.get_template_cache, {})
+        self.assertEqual(warm_templates(), len(template_names()))
+        self.assertIn('posts/index.html', {
+            template.name for template in cached.get_template_cache.values()
+        })
@@ -0,0 +1,50 @@
+from django.template import Context, Template
+from django.test import TestCase
+
+from posts.forms import PostForm
+from users.forms import CreationForm
+
+from ..templatetags import user_filters
+
+RENDER_FORM = Template(
+    "{% load user_filters %}{% render_form form 'form-control' %}")
+
+
+class RenderFormTests(TestCase):
+    def render(self, form):
+        return RENDER_FORM.render(Context({'form': form}))
+
+    def test_fields_markup(self):
+        """Виджеты получают класс, обязательные поля — отметку и
+        атрибут required, подсказки выводятся под полем."""
+        html = self.render(CreationForm())
+        for fragment in (
+            'class="form-control"',
+            'aria-required="true"',
+            '<label for="id_username">',
+            '<span class="required text-danger">*</span>',
+            'id="id_username-help"',
+            'name="password2"',
+        ):
+            with self.subTest(fragment=fragment):
+                self.assertIn(fragment, html)
+        self.assertEqual(html.count('<label'), len(CreationForm().fields))
+
+    def test_values_are_rendered_per_form(self):
+        """Разметка общая для класса формы, значения — свои у каждой."""
+        user_filters._layouts.clear()
+        first = self.render(PostForm({'text': 'Первый текст'}))
+        second = self.render(PostForm({'text': 'Второй текст'}))
+        self.assertEqual(len(user_filters._layouts), 1)
+        self.assertIn('Первый текст', first)
+        self.assertIn('Второй текст', second)
+        self.assertNotIn('Первый текст', second)
+
+    def test_matches_addclass(self):
+        """Виджет такой же, как у фильтра addclass."""
+        form = PostForm({'text': 'Текст'})
+        for name in form.fields:
+            with self.subTest(field=name):
+                self.assertIn(
+                    user_filters.addclass(form[name], 'form-control'),
+                    self.render(form))
@@ -0,0 +1,11 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+
+from .instrumentation import registry
+
+
+@staff_member_required
+def request_stats(request):
+    """Гистограммы RequestStatsMiddleware, только для персонала: за
+    локальным прокси все клиенты приходят с адреса 127.0.0.1."""
+    return JsonResponse(registry.as_dict())
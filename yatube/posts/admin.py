@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Group, Post
+from .models import Follow, Group, Post
 
 
 @admin.register(Post)
@@ -17,3 +17,9 @@ class GroupAdmin(admin.ModelAdmin):
     list_display = ('title', 'slug')
     list_display_links = ('title', 'slug')
     prepopulated_fields = {"slug": ("title",)}
+
+
+@admin.register(Follow)
+class FollowAdmin(admin.ModelAdmin):
+    list_display = ('user', 'author', 'group')
+    empty_value_display = '-пусто-'
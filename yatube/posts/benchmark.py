@@ -0,0 +1,373 @@
+import asyncio
+import io
+import math
+import random
+import re
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import OperationalError, connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from faker import Faker
+from mixer.backend.django import mixer
+
+from core.asgi import ASGIHandler, build_environ
+
+from .models import Group, Post, PostCounter, User
+from .pagination import ORDERING, encode_cursor
+
+TEXT_POOL_SIZE = 500
+USERNAME_PREFIX = 'bench_'
+TEXT_LENGTHS = (200, 1000, 4000)
+SEED_PERIOD = timedelta(days=3 * 365)
+
+
+@contextmanager
+def benchmark_database(db_name, keepdb=False):
+    """Отдельная база для замеров, рабочая база не затрагивается."""
+    connection.settings_dict['TEST']['NAME'] = db_name
+    old_name = connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False, keepdb=keepdb)
+    try:
+        yield
+    finally:
+        connections.close_all()
+        if not keepdb:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def seed(posts, users, groups, batch_size=5000, random_seed=0, log=None):
+    """Заполняет базу пользователями, группами и записями.
+
+    Записи создаются через bulk_create пачками по batch_size, тексты
+    берутся из заранее сгенерированного Faker набора. Если в базе уже
+    есть пользователи бенчмарка, она считается заполненной и не
+    меняется: число записей для этого не годится, сценарий post_create
+    его увеличивает. Возвращает True, если база заполнена заново.
+    """
+    log = log or (lambda message: None)
+    if is_seeded():
+        log('База уже заполнена, используется как есть.')
+        return False
+    fake = Faker('ru_RU')
+    Faker.seed(random_seed)
+    rnd = random.Random(random_seed)
+    mixer.cycle(groups).blend(Group)
+    User.objects.bulk_create(
+        (User(username=f'{USERNAME_PREFIX}{num}',
+              first_name=fake.first_name(),
+              last_name=fake.last_name())
+         for num in range(users)),
+        batch_size=batch_size,
+    )
+    user_ids = list(User.objects.values_list('pk', flat=True))
+    group_ids = list(Group.objects.values_list('pk', flat=True)) + [None]
+    texts = [
+        fake.text(max_nb_chars=rnd.choice(TEXT_LENGTHS))
+        for _ in range(TEXT_POOL_SIZE)
+    ]
+    start = timezone.now() - SEED_PERIOD
+    step = SEED_PERIOD / max(posts, 1)
+    for offset in range(0, posts, batch_size):
+        batch = []
+        for num in range(offset, min(offset + batch_size, posts)):
+            pub_date = start + step * num
+            batch.append(Post(
+                text=rnd.choice(texts),
+                author_id=rnd.choice(user_ids),
+                group_id=rnd.choice(group_ids),
+                pub_date=pub_date,
+                edited=pub_date,
+            ))
+        Post.objects.bulk_create_dated(batch)
+        log(f'Записей: {offset + len(batch)} из {posts}')
+    PostCounter.objects.all().delete()
+    return True
+
+
+def is_seeded():
+    return User.objects.filter(
+        username__startswith=USERNAME_PREFIX).exists()
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    rank = math.ceil(percent / 100 * len(ordered))
+    return ordered[max(rank - 1, 0)]
+
+
+def scenarios(rnd):
+    """Генераторы запросов (метод, адрес, данные) для каждого сценария."""
+    slugs = list(Group.objects.values_list('slug', flat=True))
+    usernames = list(
+        User.objects.filter(posts__isnull=False)
+        .values_list('username', flat=True).distinct()[:1000])
+    first_pk = Post.objects.order_by('pk').values_list('pk', flat=True)[0]
+    last_pk = Post.objects.order_by('-pk').values_list('pk', flat=True)[0]
+    total = Post.objects.count()
+    deep_page = max(total // settings.NUMBER_OF_ENTRIES // 2, 1)
+    middle = Post.objects.order_by(*ORDERING)[total // 2]
+    index = reverse('posts:index')
+    search = reverse('posts:search')
+    # Самое частое слово: поиск с наибольшим числом совпадений.
+    words = Counter(re.findall(r'\w{4,}', ' '.join(
+        Post.objects.order_by('pk').values_list('text', flat=True)[:200])))
+    common = words.most_common(1)[0][0] if words else 'запись'
+    search_pages = settings.SEARCH_MAX_RESULTS // settings.NUMBER_OF_ENTRIES
+
+    def post_detail():
+        pk = rnd.randint(first_pk, last_pk)
+        return 'get', reverse('posts:post_detail', args=[pk]), None
+
+    return {
+        'index': lambda: ('get', index, None),
+        'index_deep_page': lambda: ('get', index, {'page': deep_page}),
+        'index_deep_cursor': lambda: (
+            'get', index, {'cursor': encode_cursor(middle)}),
+        'group_posts': lambda: ('get', reverse(
+            'posts:group_list', args=[rnd.choice(slugs)]), None),
+        'profile': lambda: ('get', reverse(
+            'posts:profile', args=[rnd.choice(usernames)]), None),
+        'post_detail': post_detail,
+        'search': lambda: ('get', search, {'q': common}),
+        'search_last_page': lambda: (
+            'get', search, {'q': common, 'page': search_pages}),
+        'post_create': lambda: ('post', reverse('posts:post_create'), {
+            'text': f'Запись бенчмарка {rnd.random()}'}),
+    }
+
+
+def measure(requests=50, random_seed=0, log=None):
+    """Задержка p50/p95, число запросов к БД и пик памяти по сценариям.
+
+    Записи, созданные сценарием post_create, в конце удаляются, чтобы
+    повторный запуск на той же базе шёл на тех же данных.
+    """
+    log = log or (lambda message: None)
+    rnd = random.Random(random_seed)
+    last_pk = Post.objects.order_by('-pk').values_list('pk', flat=True)[0]
+    client = Client()
+    client.force_login(User.objects.order_by('pk').first())
+    results = {}
+    for name, make_request in scenarios(rnd).items():
+        calls = [make_request() for _ in range(requests)]
+        method, url, data = calls[0]
+        getattr(client, method)(url, data)
+        timings = []
+        queries = []
+        for method, url, data in calls:
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                response = getattr(client, method)(url, data)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(context))
+            if response.status_code >= 400 and response.status_code != 404:
+                raise RuntimeError(f'{name}: {url} → {response.status_code}')
+        tracemalloc.start()
+        getattr(client, method)(url, data)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results[name] = {
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'queries': max(queries),
+            'peak_kb': round(peak / 1024, 1),
+        }
+        log(f'{name}: {results[name]}')
+    for post in Post.objects.filter(pk__gt=last_pk):
+        post.delete()
+    return results
+
+
+def compare(baseline, current, tolerance):
+    """Регрессии относительно базовой линии: рост p95 больше чем на
+    tolerance (доля) или рост числа запросов к БД."""
+    regressions = []
+    for name, base in baseline.items():
+        result = current.get(name)
+        if result is None:
+            continue
+        limit = base['p95_ms'] * (1 + tolerance)
+        if result['p95_ms'] > limit:
+            regressions.append(
+                f'{name}: p95 {result["p95_ms"]} мс > {limit:.3f} мс')
+        if result['queries'] > base['queries']:
+            regressions.append(
+                f'{name}: запросов {result["queries"]} > {base["queries"]}')
+    return regressions
+
+
+def run_until(stop, client, make_request, rnd):
+    """Выполняет запросы, пока не установлен stop: задержки успешных
+    запросов в мс и число ошибок."""
+    timings = []
+    errors = 0
+    while not stop.is_set():
+        method, url, data = make_request(rnd)
+        started = time.perf_counter()
+        try:
+            response = getattr(client, method)(url, data)
+        except OperationalError:
+            errors += 1
+            continue
+        if response.status_code >= 500:
+            errors += 1
+        else:
+            timings.append((time.perf_counter() - started) * 1000)
+    return timings, errors
+
+
+def measure_concurrency(readers=4, writers=1, seconds=5.0, random_seed=0):
+    """Пропускная способность чтения лент, пока другие потоки пишут.
+
+    Каждый поток работает через свой Client и своё соединение с базой.
+    Ошибки — запросы, упавшие с «database is locked» или ответом 5xx.
+    """
+    requests = scenarios(random.Random(random_seed))
+    create = requests.pop('post_create')
+    reads = list(requests.values())
+    author = User.objects.order_by('pk').first()
+    stop = threading.Event()
+    lock = threading.Lock()
+    timings = []
+    totals = {'writes': 0, 'errors': 0}
+
+    def run(make_request, login, number):
+        client = Client()
+        if login:
+            client.force_login(author)
+        rnd = random.Random(random_seed + number)
+        try:
+            done, errors = run_until(stop, client, make_request, rnd)
+        finally:
+            connection.close()
+        with lock:
+            totals['errors'] += errors
+            if login:
+                totals['writes'] += len(done)
+            else:
+                timings.extend(done)
+
+    threads = [
+        threading.Thread(
+            target=run, args=(lambda rnd: rnd.choice(reads)(), False, num))
+        for num in range(readers)
+    ] + [
+        threading.Thread(
+            target=run, args=(lambda rnd: create(), True, readers + num))
+        for num in range(writers)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return {
+        'reads_per_s': round(len(timings) / seconds, 1),
+        'read_p95_ms': round(percentile(timings or [0], 95), 3),
+        'writes_per_s': round(totals['writes'] / seconds, 1),
+        'errors': totals['errors'],
+    }
+
+
+def http_scope(url, data=None):
+    path, _, query = url.partition('?')
+    if data:
+        query = '&'.join(f'{key}={value}' for key, value in data.items())
+    return {
+        'type': 'http', 'method': 'GET', 'path': path,
+        'query_string': query.encode(), 'headers': [],
+        'server': ('localhost', 80),
+    }
+
+
+def wsgi_client(executor, delay):
+    """Медленный клиент синхронного воркера: поток занят и пока
+    запрос принимается, и пока ответ отправляется."""
+    wsgi = WSGIHandler()
+
+    def handle(url, data):
+        time.sleep(delay)
+        environ = build_environ(http_scope(url, data), io.BytesIO())
+        response = wsgi(environ, lambda status, headers: None)
+        b''.join(response)
+        response.close()
+        time.sleep(delay)
+
+    async def request(url, data):
+        await asyncio.get_running_loop().run_in_executor(
+            executor, handle, url, data)
+    return request
+
+
+def asgi_client(executor, delay):
+    """Медленный клиент ASGIHandler: ожидание клиента идёт в цикле
+    событий, поток занят только обработкой запроса."""
+    asgi = ASGIHandler(executor)
+
+    async def receive():
+        await asyncio.sleep(delay)
+        return {'type': 'http.request'}
+
+    async def send(message):
+        if (message['type'] == 'http.response.body'
+                and not message.get('more_body')):
+            await asyncio.sleep(delay)
+
+    async def request(url, data):
+        await asgi(http_scope(url, data), receive, send)
+    return request
+
+
+def measure_slow_clients(server, requests=400, clients=64, threads=8,
+                         delay=0.05, random_seed=0):
+    """Пропускная способность и задержка при медленных клиентах.
+
+    Каждый из clients клиентов по очереди запрашивает ленты и записи;
+    отправка запроса и чтение ответа занимают у клиента по delay секунд.
+    server='wsgi' — синхронные воркеры: поток из threads занят всё время
+    обмена с клиентом. server='asgi' — core.asgi.ASGIHandler: поток
+    занят только обработкой запроса.
+    """
+    generators = scenarios(random.Random(random_seed))
+    del generators['post_create']
+    rnd = random.Random(random_seed)
+    calls = [rnd.choice(list(generators.values()))()[1:]
+             for _ in range(requests)]
+    executor = ThreadPoolExecutor(threads)
+    make_client = wsgi_client if server == 'wsgi' else asgi_client
+    request = make_client(executor, delay)
+    timings = []
+
+    async def client(queue):
+        while queue:
+            url, data = queue.pop()
+            started = time.perf_counter()
+            await request(url, data)
+            timings.append((time.perf_counter() - started) * 1000)
+
+    async def run():
+        await asyncio.gather(*(client(calls) for _ in range(clients)))
+
+    started = time.perf_counter()
+    try:
+        asyncio.run(run())
+    finally:
+        executor.shutdown()
+    elapsed = time.perf_counter() - started
+    return {
+        'requests_per_s': round(requests / elapsed, 1),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+    }
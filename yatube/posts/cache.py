@@ -0,0 +1,136 @@
+import hashlib
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from . import images
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[settings.POSTS_CACHE_ALIAS]
+
+
+def count(event):
+    with _stats_lock:
+        _stats[event] += 1
+
+
+def stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def fingerprint(request, modified, *parts):
+    """Отпечаток ответа для ETag и ключа кэша страниц.
+
+    Зависит от представления, адреса вместе со страницей или курсором,
+    пользователя и времени последнего изменения данных: любая запись,
+    попавшая в ленту, сдвигает счётчик ленты и тем самым меняет отпечаток.
+    """
+    viewer = request.user.pk if request.user.is_authenticated else 'anon'
+    raw = '|'.join((
+        request.resolver_match.view_name,
+        request.get_full_path(),
+        str(viewer),
+        modified.isoformat(),
+        *parts,
+    ))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def render_conditional(request, template_name, get_context, modified,
+                       *parts, store=False):
+    """render() с ответом 304 на условный GET и, если store,
+    с кэшированием готовой страницы.
+
+    get_context вызывается, только если страницу нужно рендерить.
+    """
+    key = fingerprint(request, modified, *parts)
+    etag = quote_etag(key)
+    last_modified = int(modified.timestamp())
+    # Last-Modified точен до секунды: пока секунда изменения не прошла,
+    # в неё же может попасть новая запись, и If-Modified-Since её не
+    # заметит. До тех пор ответ проверяется только по ETag.
+    if last_modified >= int(timezone.now().timestamp()):
+        last_modified = None
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        count('not_modified')
+    elif store:
+        cache = get_cache()
+        content = cache.get('posts:page:' + key)
+        if content is not None:
+            count('hits')
+            response = HttpResponse(content)
+            response['X-Cache'] = 'HIT'
+        else:
+            count('misses')
+            response = render(request, template_name, get_context())
+            cache.set('posts:page:' + key, response.content,
+                      settings.POSTS_CACHE_TIMEOUT)
+            response['X-Cache'] = 'MISS'
+    else:
+        response = render(request, template_name, get_context())
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def render_feed(request, template_name, counter, get_context, *parts):
+    """Страница ленты: валидатор и ключ кэша берутся из её счётчика
+    и дополнительных частей, зависящих от зрителя (например, подписки)."""
+    return render_conditional(
+        request, template_name, get_context, counter.modified, counter.key,
+        *parts, store=settings.POSTS_PAGE_CACHE,
+    )
+
+
+def render_post(request, template_name, post, counter, get_context):
+    """Страница записи зависит от её правок и от счётчика записей автора."""
+    return render_conditional(
+        request, template_name, get_context,
+        max(post.edited, counter.modified), str(post.pk), counter.key,
+    )
+
+
+def card_key(post):
+    """Ключ карточки записи в ленте: всё, что она показывает, — правка
+    записи, картинка и готовность её копии, группа и имя автора."""
+    image = post.image.name if post.image else ''
+    raw = '|'.join((
+        str(post.pk),
+        post.edited.isoformat(),
+        image,
+        str(bool(image) and images.is_ready(
+            images.variant_name(image, 'feed'))),
+        post.group.slug if post.group_id else '',
+        post.author.username,
+        post.author.get_full_name(),
+    ))
+    return 'posts:card:' + hashlib.md5(raw.encode()).hexdigest()
+
+
+def render_card(post):
+    """Карточка записи для лент (post_for_list.html) из кэша
+    POSTS_CACHE_ALIAS; рендерится только при промахе."""
+    cache = get_cache()
+    key = card_key(post)
+    content = cache.get(key)
+    if content is None:
+        content = render_to_string(
+            'posts/includes/post_for_list.html', {'post': post})
+        cache.set(key, content, settings.POSTS_CACHE_TIMEOUT)
+    return content
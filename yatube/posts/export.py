@@ -0,0 +1,101 @@
+import csv
+import json
+import zlib
+
+FIELDS = ('text', 'pub_date', 'author', 'group')
+FORMATS = ('jsonl', 'csv')
+CONTENT_TYPES = {'jsonl': 'application/x-ndjson', 'csv': 'text/csv'}
+BLOCK_SIZE = 64 * 1024
+
+
+def post_rows(queryset, chunk_size=2000):
+    """Записи в виде словарей без создания объектов моделей.
+
+    Идёт по queryset серверным курсором порциями по chunk_size строк,
+    поэтому память не растёт с числом записей.
+    """
+    values = queryset.order_by('pk').values_list(
+        'text', 'pub_date', 'author__username', 'group__slug')
+    for text, pub_date, author, group in values.iterator(chunk_size):
+        yield {
+            'text': text,
+            'pub_date': pub_date.isoformat(),
+            'author': author,
+            'group': group or '',
+        }
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def jsonl_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def csv_lines(rows):
+    writer = csv.DictWriter(Echo(), FIELDS)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def serialize(rows, file_format):
+    """Построчная выгрузка в JSONL или CSV."""
+    if file_format == 'csv':
+        return csv_lines(rows)
+    return jsonl_lines(rows)
+
+
+def encode_blocks(lines, block_size=BLOCK_SIZE):
+    """Строки выгрузки в UTF-8 блоками около block_size байт, чтобы
+    ответ не уходил клиенту по строке."""
+    block = []
+    size = 0
+    for line in lines:
+        data = line.encode()
+        block.append(data)
+        size += len(data)
+        if size >= block_size:
+            yield b''.join(block)
+            block = []
+            size = 0
+    if block:
+        yield b''.join(block)
+
+
+def gzip_blocks(blocks):
+    """Сжимает поток блоков в формат gzip на лету."""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for block in blocks:
+        data = compressor.compress(block)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def deserialize(lines, file_format):
+    """Пары (номер строки, словарь полей). Вместо строки, которую не
+    удалось разобрать, отдаётся None."""
+    if file_format == 'csv':
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield number, row if isinstance(row, dict) else None
+
+
+def guess_format(path, default='jsonl'):
+    for file_format in FORMATS:
+        if path.endswith(f'.{file_format}'):
+            return file_format
+    return default
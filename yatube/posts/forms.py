@@ -1,6 +1,7 @@
 from django import forms
 
 from .models import Post
+from .widgets import AutocompleteSelect
 
 
 class PostForm(forms.ModelForm):
@@ -10,4 +11,5 @@ class PostForm(forms.ModelForm):
 
     class Meta:
         model = Post
-        fields = ('text', 'group')
+        fields = ('text', 'group', 'image')
+        widgets = {'group': AutocompleteSelect}
@@ -0,0 +1,173 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from .models import Group, Post, PostCounter
+
+AUTOCOMPLETE_LIMIT = 20
+# Больше любого символа: верхняя граница диапазона строк с префиксом.
+MAX_CHAR = chr(0x10FFFF)
+
+_lock = threading.Lock()
+_groups = None
+_loaded = 0.0
+# id группы -> дата последней записи, см. latest_dates.
+_latest = None
+_latest_loaded = 0.0
+# Растёт при каждом invalidate: загрузка, начатая раньше, устарела.
+_generation = 0
+
+
+def is_stale(loaded):
+    return time.monotonic() - loaded > settings.GROUPS_CACHE_TIMEOUT
+
+
+def get_groups():
+    """Все группы по slug, в порядке названий.
+
+    Хранятся в памяти процесса: сохранение и удаление группы сбрасывают
+    кэш сигналами, а изменения из других процессов подхватываются через
+    GROUPS_CACHE_TIMEOUT секунд. Объекты групп общие для потоков, их
+    нельзя изменять. Запрос к базе идёт без блокировки, под ней лишь
+    подменяется словарь.
+    """
+    global _groups, _loaded
+    with _lock:
+        if _groups is not None and not is_stale(_loaded):
+            return _groups
+        generation = _generation
+    groups = {group.slug: group for group in Group.objects.order_by('title')}
+    with _lock:
+        if generation == _generation:
+            _groups = groups
+            _loaded = time.monotonic()
+    return groups
+
+
+def get_group(slug):
+    """Группа по slug или None.
+
+    Незнакомый slug проверяется в базе: группа могла появиться в другом
+    процессе, тогда кэш перечитывается.
+    """
+    group = get_groups().get(slug)
+    if group is None and Group.objects.filter(slug=slug).exists():
+        invalidate()
+        group = get_groups().get(slug)
+    return group
+
+
+def invalidate():
+    global _groups, _latest, _generation
+    with _lock:
+        _groups = None
+        _latest = None
+        _generation += 1
+
+
+def latest_dates():
+    """Дата последней записи каждой группы.
+
+    Считается одним запросом раз в GROUPS_CACHE_TIMEOUT секунд, новые
+    записи этого процесса учитываются сразу через note_post. Удалённая
+    запись остаётся в дате до следующего пересчёта. Запрос идёт без
+    блокировки; даты, отмеченные note_post за время запроса,
+    переносятся в новый словарь.
+    """
+    global _latest, _latest_loaded
+    with _lock:
+        if _latest is not None and not is_stale(_latest_loaded):
+            return _latest
+        generation = _generation
+    started = timezone.now()
+    latest = dict(
+        Post.objects.filter(group__isnull=False).order_by()
+        .values_list('group').annotate(Max('pub_date'))
+    )
+    with _lock:
+        if generation != _generation:
+            return latest
+        for group_id, date in (_latest or {}).items():
+            if date >= started and latest.get(group_id, date) <= date:
+                latest[group_id] = date
+        _latest = latest
+        _latest_loaded = time.monotonic()
+    return latest
+
+
+def note_post(post):
+    """Учитывает в датах групп новую или перенесённую запись."""
+    with _lock:
+        if _latest is None or post.group_id is None:
+            return
+        latest = _latest.get(post.group_id)
+        if latest is None or latest < post.pub_date:
+            _latest[post.group_id] = post.pub_date
+
+
+def group_counters(group_list):
+    """Счётчики записей групп; недостающие создаются одним запросом
+    COUNT(*) ... GROUP BY на все группы сразу."""
+    keys = {PostCounter.group_key(group.pk): group for group in group_list}
+    counters = PostCounter.objects.in_bulk(list(keys), field_name='key')
+    missing = [group.pk for key, group in keys.items() if key not in counters]
+    if missing:
+        counts = dict(
+            Post.objects.filter(group__in=missing).order_by()
+            .values_list('group').annotate(Count('pk'))
+        )
+        PostCounter.objects.bulk_create(
+            [PostCounter(key=PostCounter.group_key(pk),
+                         count=counts.get(pk, 0))
+             for pk in missing],
+            ignore_conflicts=True,
+        )
+        counters = PostCounter.objects.in_bulk(list(keys), field_name='key')
+    return counters
+
+
+def directory(group_list):
+    """Группы с числом записей и датой последней записи.
+
+    Число записей берётся из счётчиков лент, дата — из latest_dates,
+    так что страница каталога стоит одинаково при любом числе групп.
+    """
+    counters = group_counters(group_list)
+    latest = latest_dates()
+    return [
+        {
+            'group': group,
+            'count': counters[PostCounter.group_key(group.pk)].count,
+            'latest': latest.get(group.pk),
+        }
+        for group in group_list
+    ]
+
+
+def prefix(field, value):
+    """Условие «field начинается с value» в виде диапазона строк.
+
+    В отличие от регистронезависимого LIKE, которым SQLite выполняет
+    startswith, диапазон всегда читается по обычному индексу.
+    """
+    return Q(**{f'{field}__gte': value, f'{field}__lt': value + MAX_CHAR})
+
+
+def autocomplete(query, limit=AUTOCOMPLETE_LIMIT):
+    """(pk, название) групп, чьё название или slug начинается с query.
+
+    Названия сравниваются с учётом регистра, поэтому ищется и вариант
+    с заглавной первой буквой.
+    """
+    query = query.strip()
+    groups = Group.objects.order_by('title')
+    if query:
+        groups = groups.filter(
+            prefix('title', query)
+            | prefix('title', query[:1].upper() + query[1:])
+            | prefix('slug', query.lower())
+        )
+    return groups.values_list('pk', 'title')[:limit]
@@ -0,0 +1,189 @@
+import hashlib
+import io
+import logging
+import os
+import queue
+import tempfile
+import threading
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.dispatch import Signal
+from django.templatetags.static import static
+from django.utils.deconstruct import deconstructible
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_DIR = 'posts'
+THUMBNAIL_DIR = 'posts/thumbs'
+# Показывается вместо копии, пока фоновый поток её не приготовил.
+PLACEHOLDER = 'posts/img/placeholder.svg'
+
+# Копии картинки name готовы: ленты с ней нужно перерисовать.
+variants_created = Signal(providing_args=['name'])
+
+_ready_lock = threading.Lock()
+# Имена готовых копий: копии не удаляются, так что проверять их
+# в хранилище повторно не нужно.
+_ready = set()
+
+
+@deconstructible
+class HashedStorage(FileSystemStorage):
+    """Хранилище, где имя файла — хэш содержимого.
+
+    Одинаковые картинки получают одно имя, поэтому повторная загрузка
+    не пишет файл заново, а лишь ссылается на уже сохранённый.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        """Пишет во временный файл рядом и переименовывает его.
+
+        FileSystemStorage при занятом имени просит новое у
+        get_available_name и, получая то же самое, повторяет запись
+        бесконечно. Здесь одновременная загрузка той же картинки просто
+        заменяет файл таким же.
+        """
+        if self.exists(name):
+            return name
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                for chunk in content.chunks():
+                    file.write(chunk)
+            os.chmod(temp_path, self.file_permissions_mode or 0o644)
+            os.replace(temp_path, full_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return name.replace('\\', '/')
+
+
+storage = HashedStorage()
+
+
+def content_hash(file):
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def upload_to(instance, filename):
+    """posts/<2 знака хэша>/<sha256>.<расширение>."""
+    digest = content_hash(instance.image)
+    extension = os.path.splitext(filename)[1].lower()
+    return f'{UPLOAD_DIR}/{digest[:2]}/{digest}{extension}'
+
+
+def variant_name(name, size):
+    """Имя уменьшенной копии: выводится из имени оригинала, поэтому
+    шаблону не нужно ничего искать в базе."""
+    digest = os.path.splitext(os.path.basename(name))[0]
+    return f'{THUMBNAIL_DIR}/{digest}-{size}.jpg'
+
+
+def is_ready(variant):
+    """Есть ли копия в хранилище. Хранилище спрашивается, только пока
+    копия не найдена."""
+    with _ready_lock:
+        if variant in _ready:
+            return True
+    if not storage.exists(variant):
+        return False
+    with _ready_lock:
+        _ready.add(variant)
+    return True
+
+
+def variant_url(image, size):
+    """Адрес готовой копии или, пока её нет, заглушки: оригинал в
+    полном размере в ленту не попадает."""
+    if not image:
+        return ''
+    name = variant_name(image.name, size)
+    if is_ready(name):
+        return storage.url(name)
+    return static(PLACEHOLDER)
+
+
+def make_variants(name):
+    """Создаёт недостающие копии картинки всех размеров
+    POSTS_THUMBNAIL_SIZES и сообщает о них сигналом variants_created.
+    Возвращает число созданных."""
+    missing = [
+        (size, variant_name(name, size))
+        for size in settings.POSTS_THUMBNAIL_SIZES
+        if not storage.exists(variant_name(name, size))
+    ]
+    if not missing:
+        return 0
+    with storage.open(name) as file, Image.open(file) as original:
+        original = ImageOps.exif_transpose(original).convert('RGB')
+        for size, variant in missing:
+            width, height, crop = settings.POSTS_THUMBNAIL_SIZES[size]
+            if crop:
+                image = ImageOps.fit(original, (width, height))
+            else:
+                image = original.copy()
+                image.thumbnail((width, height))
+            buffer = io.BytesIO()
+            image.save(buffer, 'JPEG', quality=85, optimize=True)
+            storage.save(variant, ContentFile(buffer.getvalue()))
+    variants_created.send(sender=None, name=name)
+    return len(missing)
+
+
+class ThumbnailWorker:
+    """Фоновый поток, который готовит копии картинок вне запросов.
+
+    Очередь живёт в памяти процесса: задания, не выполненные до его
+    остановки, доделывает команда make_thumbnails.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def submit(self, name):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self.run, name='thumbnails', daemon=True)
+                self.thread.start()
+        self.queue.put(name)
+
+    def run(self):
+        while True:
+            name = self.queue.get()
+            try:
+                make_variants(name)
+            except Exception:
+                logger.exception('Не удалось уменьшить %s', name)
+            finally:
+                self.queue.task_done()
+
+    def join(self):
+        """Ждёт, пока очередь опустеет."""
+        self.queue.join()
+
+
+worker = ThumbnailWorker()
+
+
+def schedule(name):
+    if settings.POSTS_THUMBNAILS_ASYNC:
+        worker.submit(name)
+    else:
+        make_variants(name)
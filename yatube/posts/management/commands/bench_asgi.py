@@ -0,0 +1,54 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.benchmark import benchmark_database, measure_slow_clients, seed
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность лент при медленных '
+            'клиентах для синхронных воркеров WSGI и для yatube.asgi '
+            'с тем же числом потоков.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--requests', type=int, default=400)
+        parser.add_argument(
+            '--clients', type=int, default=64,
+            help='Число одновременных клиентов.')
+        parser.add_argument(
+            '--threads', type=int, default=settings.ASGI_THREADS,
+            help='Потоки: воркеры WSGI или пул ASGI.')
+        parser.add_argument(
+            '--delay', type=float, default=0.05,
+            help='Секунды на отправку запроса и на чтение ответа клиентом.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--db-name',
+            default=os.path.join(settings.BASE_DIR, 'bench.sqlite3'),
+            help='Файл базы для замеров, рабочая база не затрагивается.')
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help='Не удалять базу после замеров и не заполнять её повторно.')
+        parser.add_argument('--output', help='Сохранить результаты в JSON.')
+
+    def handle(self, **options):
+        results = {}
+        with benchmark_database(options['db_name'], options['keepdb']):
+            seed(options['posts'], options['users'], options['groups'],
+                 random_seed=options['seed'], log=self.stdout.write)
+            for server in ('wsgi', 'asgi'):
+                results[server] = measure_slow_clients(
+                    server, options['requests'], options['clients'],
+                    options['threads'], options['delay'], options['seed'])
+                self.stdout.write(f'{server}: {results[server]}')
+        self.stdout.write('Рост запросов в секунду: ×{:.2f}'.format(
+            results['asgi']['requests_per_s']
+            / results['wsgi']['requests_per_s']))
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
@@ -0,0 +1,75 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import override_settings
+
+from posts.benchmark import benchmark_database, measure_concurrency, seed
+
+# Настройки SQLite по умолчанию: журнал отката и новое соединение
+# на каждый запрос.
+BASELINE = {'pragmas': {'journal_mode': 'DELETE'}, 'conn_max_age': 0}
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность чтения при одновременных '
+            'записях для SQLite по умолчанию и для SQLITE_PRAGMAS и '
+            'CONN_MAX_AGE текущих настроек. Запускать с '
+            '--settings=yatube.settings_production.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument(
+            '--seconds', type=float, default=10.0,
+            help='Длительность замера для каждого профиля.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--db-name',
+            default=os.path.join(settings.BASE_DIR, 'bench.sqlite3'),
+            help='Файл базы для замеров, рабочая база не затрагивается.')
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help='Не удалять базу после замеров и не заполнять её повторно.')
+        parser.add_argument('--output', help='Сохранить результаты в JSON.')
+
+    def handle(self, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда работает только с SQLite.')
+        if not settings.SQLITE_PRAGMAS:
+            raise CommandError(
+                'SQLITE_PRAGMAS пусты: запустите команду с '
+                '--settings=yatube.settings_production.')
+        profiles = {
+            'baseline': BASELINE,
+            'tuned': {
+                'pragmas': settings.SQLITE_PRAGMAS,
+                'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+            },
+        }
+        results = {}
+        with benchmark_database(options['db_name'], options['keepdb']):
+            seed(options['posts'], options['users'], options['groups'],
+                 random_seed=options['seed'], log=self.stdout.write)
+            for name, profile in profiles.items():
+                connections.close_all()
+                connection.settings_dict['CONN_MAX_AGE'] = (
+                    profile['conn_max_age'])
+                with override_settings(SQLITE_PRAGMAS=profile['pragmas']):
+                    # Соединение с новыми PRAGMA переключает режим журнала.
+                    connection.ensure_connection()
+                    results[name] = measure_concurrency(
+                        options['readers'], options['writers'],
+                        options['seconds'], options['seed'])
+                self.stdout.write(f'{name}: {results[name]}')
+        baseline = results['baseline']['reads_per_s'] or 1
+        self.stdout.write('Рост чтений в секунду: ×{:.2f}'.format(
+            results['tuned']['reads_per_s'] / baseline))
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
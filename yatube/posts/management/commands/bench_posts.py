@@ -0,0 +1,68 @@
+import json
+import os
+import platform
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.benchmark import benchmark_database, compare, measure, seed
+
+
+class Command(BaseCommand):
+    help = ('Замеряет задержку, число запросов к БД и память представлений '
+            'posts на отдельной базе с заданным объёмом данных.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=100)
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Число замеров на сценарий.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--db-name',
+            default=os.path.join(settings.BASE_DIR, 'bench.sqlite3'),
+            help='Файл базы для замеров, рабочая база не затрагивается.')
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help='Не удалять базу после замеров и не заполнять её повторно.')
+        parser.add_argument(
+            '--output', help='Сохранить результаты в JSON как базовую линию.')
+        parser.add_argument(
+            '--compare', help='JSON базовой линии для поиска регрессий.')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help='Допустимый рост p95 относительно базовой линии.')
+
+    def handle(self, **options):
+        with benchmark_database(options['db_name'], options['keepdb']):
+            seed(options['posts'], options['users'], options['groups'],
+                 random_seed=options['seed'], log=self.stdout.write)
+            results = measure(options['requests'], options['seed'],
+                              log=self.stdout.write)
+        report = {
+            'meta': {
+                'posts': options['posts'],
+                'users': options['users'],
+                'groups': options['groups'],
+                'requests': options['requests'],
+                'python': platform.python_version(),
+                'django': django.get_version(),
+            },
+            'views': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as file:
+                baseline = json.load(file)
+            regressions = compare(
+                baseline['views'], results, options['tolerance'])
+            if regressions:
+                raise CommandError(
+                    'Регрессии производительности:\n'
+                    + '\n'.join(regressions))
+            self.stdout.write('Регрессий нет.')
@@ -0,0 +1,57 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.export import FORMATS, guess_format, post_rows, serialize
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Выгружает записи в JSONL или CSV, не загружая их в память.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл для выгрузки, по умолчанию stdout.')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--author', help='Только записи этого автора.')
+        parser.add_argument('--group', help='Только записи этой группы.')
+        parser.add_argument(
+            '--progress', type=int, default=100000,
+            help='Сообщать о ходе выгрузки каждые N строк.')
+
+    def handle(self, path, **options):
+        file_format = options['format'] or guess_format(path)
+        post_list = Post.objects.all()
+        if options['author']:
+            post_list = post_list.filter(
+                author__username=options['author'])
+        if options['group']:
+            post_list = post_list.filter(group__slug=options['group'])
+        rows = post_rows(post_list, options['chunk_size'])
+        if path == '-':
+            # stdout занят данными: о ходе выгрузки сообщаем в stderr.
+            self.report = self.stderr
+            exported = self.export(rows, file_format, sys.stdout,
+                                   options['progress'])
+        else:
+            self.report = self.stdout
+            with open(path, 'w', encoding='utf-8', newline='') as file:
+                exported = self.export(rows, file_format, file,
+                                       options['progress'])
+        self.report.write(f'Выгружено записей: {exported}')
+
+    def export(self, rows, file_format, file, progress):
+        started = time.monotonic()
+        exported = 0
+        lines = serialize(rows, file_format)
+        if file_format == 'csv':
+            file.write(next(lines))
+        for exported, line in enumerate(lines, 1):
+            file.write(line)
+            if exported % progress == 0:
+                rate = exported / (time.monotonic() - started)
+                self.report.write(f'{exported} строк, {rate:.0f} строк/с')
+        return exported
@@ -0,0 +1,151 @@
+import sys
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts import timeline
+from posts.export import FORMATS, deserialize, guess_format
+from posts.models import Group, Post, PostCounter, User
+
+
+# Старые сборки SQLite принимают не больше 999 параметров в запросе.
+LOOKUP_CHUNK_SIZE = 900
+
+
+class Lookup:
+    """Словарь имя → id, дополняемый запросами на пачку строк по
+    LOOKUP_CHUNK_SIZE имён."""
+
+    def __init__(self, queryset, field):
+        self.queryset = queryset
+        self.field = field
+        self.ids = {}
+
+    def load(self, names):
+        missing = list(set(names) - self.ids.keys())
+        for start in range(0, len(missing), LOOKUP_CHUNK_SIZE):
+            self.ids.update(self.queryset.filter(**{
+                f'{self.field}__in': missing[start:start + LOOKUP_CHUNK_SIZE]
+            }).values_list(self.field, 'pk'))
+
+    def get(self, name):
+        return self.ids.get(name)
+
+
+class Command(BaseCommand):
+    help = ('Загружает записи из JSONL или CSV пачками через bulk_create. '
+            'Автор задаётся username, группа — slug.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл с записями, "-" — читать из stdin.')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--progress', type=int, default=100000,
+            help='Сообщать о ходе загрузки каждые N строк.')
+
+    def handle(self, path, **options):
+        for name in ('batch_size', 'progress'):
+            if options[name] < 1:
+                raise CommandError(
+                    f'--{name.replace("_", "-")} должен быть больше нуля.')
+        file_format = options['format'] or guess_format(path)
+        if path == '-':
+            imported, skipped = self.load(sys.stdin, file_format, **options)
+        else:
+            try:
+                file = open(path, encoding='utf-8', newline='')
+            except OSError as error:
+                raise CommandError(error)
+            with file:
+                imported, skipped = self.load(file, file_format, **options)
+        # bulk_create не вызывает сигналов: счётчики лент пересчитаются
+        # при следующем обращении.
+        PostCounter.objects.all().delete()
+        self.stdout.write(
+            f'Загружено записей: {imported}, пропущено: {skipped}')
+
+    def load(self, file, file_format, batch_size, progress, **options):
+        authors = Lookup(User.objects.all(), 'username')
+        groups = Lookup(Group.objects.all(), 'slug')
+        rows = deserialize(file, file_format)
+        started = time.monotonic()
+        imported = skipped = 0
+        # bulk_create не вызывает сигналов: ленты подписчиков дополняются
+        # после каждой пачки записями новее last_pk.
+        last_pk = Post.objects.aggregate(last=Max('pk'))['last'] or 0
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            valid = [row for _, row in batch
+                     if self.check_row(row) is None]
+            authors.load(row['author'] for row in valid)
+            groups.load(row['group'] for row in valid if row.get('group'))
+            posts = []
+            for number, row in batch:
+                post = self.make_post(number, row, authors, groups)
+                if post is None:
+                    skipped += 1
+                else:
+                    posts.append(post)
+            Post.objects.bulk_create_dated(posts)
+            last_pk = timeline.fan_out_after(last_pk)
+            reported = imported // progress
+            imported += len(posts)
+            if imported // progress > reported:
+                rate = imported / (time.monotonic() - started)
+                self.stdout.write(
+                    f'{imported} строк, {rate:.0f} строк/с')
+        return imported, skipped
+
+    def skip(self, number, reason):
+        self.stderr.write(f'Пропущена строка {number}: {reason}')
+
+    @staticmethod
+    def check_row(row):
+        """Причина, по которой строку нельзя загрузить, или None."""
+        if row is None:
+            return 'не удалось разобрать'
+        if not isinstance(row.get('author'), str) or not row['author']:
+            return 'нет автора'
+        if not isinstance(row.get('group') or '', str):
+            return 'неверная группа'
+        if not row.get('text'):
+            return 'нет текста'
+        return None
+
+    def make_post(self, number, row, authors, groups):
+        """Запись из строки файла или None, если строку надо пропустить."""
+        reason = self.check_row(row)
+        if reason is None:
+            author_id = authors.get(row['author'])
+            group = row.get('group') or ''
+            group_id = groups.get(group) if group else None
+            if author_id is None or (group and group_id is None):
+                reason = (f'нет автора {row["author"]!r} '
+                          f'или группы {group!r}')
+        if reason is None:
+            try:
+                pub_date = parse_datetime(row.get('pub_date') or '')
+            except (TypeError, ValueError):
+                reason = f'неверная дата {row["pub_date"]!r}'
+        if reason is not None:
+            self.skip(number, reason)
+            return None
+        if pub_date is None:
+            pub_date = timezone.now()
+        elif timezone.is_naive(pub_date):
+            pub_date = timezone.make_aware(pub_date)
+        return Post(
+            text=row['text'],
+            author_id=author_id,
+            group_id=group_id,
+            pub_date=pub_date,
+            edited=pub_date,
+        )
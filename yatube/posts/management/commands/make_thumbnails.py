@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts.images import make_variants
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Создаёт недостающие копии картинок записей, например после '
+            'перезапуска процесса с непустой очередью.')
+
+    def handle(self, **options):
+        names = (
+            Post.objects.exclude(image='')
+            .order_by().values_list('image', flat=True).distinct()
+        )
+        created = 0
+        for name in names.iterator():
+            created += make_variants(name)
+        self.stdout.write(f'Создано копий: {created}')
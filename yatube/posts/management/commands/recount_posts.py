@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import PostCounter
+
+
+class Command(BaseCommand):
+    help = ('Сверяет счётчики записей лент с таблицей записей и '
+            'исправляет разошедшиеся. Запускать периодически и после '
+            'правок базы в обход сигналов.')
+
+    def handle(self, **options):
+        fixed = PostCounter.objects.reconcile()
+        for counter in fixed:
+            self.stdout.write(f'Исправлен {counter}')
+        self.stdout.write(f'Исправлено счётчиков: {len(fixed)}')
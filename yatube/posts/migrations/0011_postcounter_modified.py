@@ -0,0 +1,19 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:06
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_postcounter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postcounter',
+            name='modified',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:40
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+BATCH_SIZE = 2000
+# Копия posts.models.make_excerpt на момент миграции: миграция не должна
+# меняться вместе с кодом приложения.
+EXCERPT_WORDS = 50
+
+
+def make_excerpt(text):
+    return Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+
+
+def fill_excerpts(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    posts = Post.objects.db_manager(schema_editor.connection.alias)
+    batch = []
+    for post in posts.only('text').order_by('pk').iterator(BATCH_SIZE):
+        post.excerpt = make_excerpt(post.text)
+        batch.append(post)
+        if len(batch) == BATCH_SIZE:
+            posts.bulk_update(batch, ['excerpt'])
+            batch = []
+    posts.bulk_update(batch, ['excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_post_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False, verbose_name='Начало текста'),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,26 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, Max, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.text import Truncator
+
+from . import images
 
 User = get_user_model()
 
+EXCERPT_WORDS = 50
+# Поля записи, которые нужны карточке в ленте (post_for_list.html).
+FEED_FIELDS = ('excerpt', 'pub_date', 'edited', 'image', 'author', 'group')
+FEED_RELATED_FIELDS = {
+    'author': ('username', 'first_name', 'last_name'),
+    'group': ('slug',),
+}
+
+
+def make_excerpt(text):
+    return Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+
 
 class Group(models.Model):
     title = models.CharField(
@@ -24,20 +42,75 @@ class Group(models.Model):
     class Meta:
         verbose_name = "Группа"
         verbose_name_plural = "Группы"
+        indexes = [
+            # Поиск по началу названия, см. posts.groups.autocomplete.
+            models.Index(fields=['title'], name='group_title_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def feed(self, *related):
+        """Записи для лент: только начало текста, даты и связи,
+        полный текст не читается."""
+        fields = list(FEED_FIELDS)
+        for name in related:
+            fields += [
+                f'{name}__{field}' for field in FEED_RELATED_FIELDS[name]]
+        return self.select_related(*related).only(*fields)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create не вызывает save(), начало текста заполняется здесь.
+        objs = list(objs)
+        for obj in objs:
+            obj.excerpt = make_excerpt(obj.text)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_create_dated(self, objs, batch_size=None):
+        """bulk_create, сохраняющий заданные pub_date и edited записей.
+
+        auto_now_add и auto_now подставляют при вставке текущее время,
+        поэтому даты возвращаются строкам вторым запросом bulk_update,
+        который pre_save не вызывает. Поля модели не меняются, так что
+        метод можно вызывать из любого потока.
+        """
+        objs = list(objs)
+        dates = [(obj.pub_date, obj.edited) for obj in objs]
+        with transaction.atomic(using=self.db):
+            self.bulk_create(objs, batch_size=batch_size)
+            if objs and objs[-1].pk is None:
+                # SQLite не возвращает id из bulk_create, но внутри
+                # транзакции выдаёт вставленным строкам подряд идущие rowid.
+                last = self.aggregate(last=Max('pk'))['last']
+                for pk, obj in enumerate(objs, last - len(objs) + 1):
+                    obj.pk = pk
+            for obj, (pub_date, edited) in zip(objs, dates):
+                obj.pub_date, obj.edited = pub_date, edited
+            self.bulk_update(
+                objs, ['pub_date', 'edited'], batch_size=batch_size)
+        return objs
+
+
 class Post(models.Model):
     text = models.TextField(
         verbose_name="Текст поста",
         help_text="Добавьте описание поста"
     )
+    excerpt = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name="Начало текста"
+    )
     pub_date = models.DateTimeField(
         auto_now_add=True,
         verbose_name="Дата публикации"
     )
+    edited = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Дата изменения"
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -53,11 +126,229 @@ class Post(models.Model):
         verbose_name="Группа",
         help_text="Укажите группу в которой опубликуется пост"
     )
+    image = models.ImageField(
+        upload_to=images.upload_to,
+        storage=images.storage,
+        blank=True,
+        verbose_name="Картинка",
+        help_text="Загрузите картинку"
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id')
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='post_pub_date_idx',
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_pub_date_idx',
+            ),
+            models.Index(
+                fields=('group', '-pub_date', '-id'),
+                name='post_group_pub_date_idx',
+            ),
+        )
         verbose_name = "Статья"
         verbose_name_plural = "Статьи"
 
     def __str__(self):
         return self.text[:15]
+
+    def save(self, *args, **kwargs):
+        if 'text' not in self.get_deferred_fields():
+            self.excerpt = make_excerpt(self.text)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'text' in update_fields:
+                kwargs['update_fields'] = {*update_fields, 'excerpt'}
+        super().save(*args, **kwargs)
+
+    @property
+    def feed_image_url(self):
+        return images.variant_url(self.image, 'feed')
+
+    @property
+    def detail_image_url(self):
+        return images.variant_url(self.image, 'detail')
+
+    def counter_keys(self):
+        """Ключи счётчиков всех лент, в которые попадает запись."""
+        keys = [PostCounter.INDEX, PostCounter.author_key(self.author_id)]
+        if self.group_id is not None:
+            keys.append(PostCounter.group_key(self.group_id))
+        return keys
+
+
+class PostCounterManager(models.Manager):
+    def get_counter(self, key, queryset):
+        """Счётчик ленты.
+
+        Счётчик создаётся при первом обращении по COUNT(*) из queryset,
+        дальше поддерживается сигналами сохранения и удаления записей.
+        """
+        try:
+            return self.get(key=key)
+        except self.model.DoesNotExist:
+            counter, _ = self.get_or_create(
+                key=key, defaults={'count': queryset.count()}
+            )
+            return counter
+
+    def get_count(self, key, queryset):
+        return self.get_counter(key, queryset).count
+
+    def touch(self, keys):
+        """Отмечает изменение лент keys: так сбрасываются валидаторы
+        и кэш страниц после правки того, что видно в этих лентах, —
+        названия группы или имени автора."""
+        return self.filter(key__in=keys).update(modified=timezone.now())
+
+    def shift(self, keys, delta=0):
+        """Сдвигает счётчики лент и отмечает время их изменения.
+
+        Счётчик не уходит ниже нуля, даже если разошёлся с таблицей;
+        точное значение восстанавливает reconcile.
+        """
+        return self.filter(key__in=keys).update(
+            count=Greatest(F('count') + delta, 0), modified=timezone.now()
+        )
+
+    def actual_counts(self):
+        """Ключ ленты -> число записей в ней по таблице записей."""
+        posts = Post.objects.order_by()
+        counts = {self.model.INDEX: posts.count()}
+        for author_id, count in (
+                posts.values_list('author').annotate(Count('pk'))):
+            counts[self.model.author_key(author_id)] = count
+        for group_id, count in (
+                posts.filter(group__isnull=False)
+                .values_list('group').annotate(Count('pk'))):
+            counts[self.model.group_key(group_id)] = count
+        return counts
+
+    def reconcile(self):
+        """Пересчитывает разошедшиеся счётчики по таблице записей.
+
+        Счётчики расходятся после удалений в обход сигналов, загрузки
+        через bulk_create или сбоя между записью и сигналом. Возвращает
+        исправленные счётчики.
+        """
+        counts = self.actual_counts()
+        now = timezone.now()
+        fixed = []
+        for counter in self.all():
+            count = counts.get(counter.key, 0)
+            if counter.count != count:
+                counter.count = count
+                counter.modified = now
+                fixed.append(counter)
+        self.bulk_update(fixed, ['count', 'modified'], batch_size=500)
+        return fixed
+
+
+class PostCounter(models.Model):
+    INDEX = 'index'
+
+    key = models.CharField(max_length=64, unique=True)
+    count = models.PositiveIntegerField(default=0)
+    modified = models.DateTimeField(default=timezone.now)
+
+    objects = PostCounterManager()
+
+    class Meta:
+        verbose_name = "Счётчик записей"
+        verbose_name_plural = "Счётчики записей"
+
+    def __str__(self):
+        return f'{self.key}: {self.count}'
+
+    @staticmethod
+    def author_key(author_id):
+        return f'author:{author_id}'
+
+    @staticmethod
+    def group_key(group_id):
+        return f'group:{group_id}'
+
+
+class Follow(models.Model):
+    """Подписка пользователя на автора или на группу."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follower',
+        verbose_name="Подписчик"
+    )
+    author = models.ForeignKey(
+        User,
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='following',
+        verbose_name="Автор"
+    )
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='followers',
+        verbose_name="Группа"
+    )
+
+    class Meta:
+        verbose_name = "Подписка"
+        verbose_name_plural = "Подписки"
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'), name='unique_author_follow'),
+            models.UniqueConstraint(
+                fields=('user', 'group'), name='unique_group_follow'),
+            models.CheckConstraint(
+                check=(Q(author__isnull=False, group__isnull=True)
+                       | Q(author__isnull=True, group__isnull=False)),
+                name='follow_author_or_group'),
+        )
+
+    def __str__(self):
+        return f'{self.user} → {self.author or self.group}'
+
+
+class TimelineEntry(models.Model):
+    """Запись в ленте подписок пользователя.
+
+    Заполняется при публикации (fan-out on write), поэтому страница
+    ленты читается одним диапазоном индекса (user, pub_date, id).
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries'
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        ordering = ('-pub_date', '-id')
+        verbose_name = "Запись ленты подписок"
+        verbose_name_plural = "Записи ленты подписок"
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'), name='unique_timeline_entry'),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-id'),
+                name='timeline_user_pub_date_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.user}: {self.post}'
@@ -0,0 +1,172 @@
+import base64
+import binascii
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+FORWARD = 'n'
+BACKWARD = 'p'
+ORDERING = ('-pub_date', '-id')
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(post, direction=FORWARD):
+    """Непрозрачный токен позиции записи в ленте: (pub_date, id)."""
+    raw = f'{direction}|{post.pub_date.isoformat()}|{post.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        direction, pub_date, pk = (
+            base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        )
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (ValueError, binascii.Error, UnicodeDecodeError) as error:
+        raise InvalidCursor(cursor) from error
+    if direction not in (FORWARD, BACKWARD) or pub_date is None:
+        raise InvalidCursor(cursor)
+    return direction, pub_date, pk
+
+
+class ElidedPage(Page):
+    @property
+    def elided_page_range(self):
+        return self.paginator.get_elided_page_range(self.number)
+
+
+class ElidedPaginator(Paginator):
+    """Пагинатор с сокращённым списком страниц.
+
+    Число ссылок на страницы не зависит от длины ленты: первые и
+    последние страницы, соседи текущей и многоточия между ними.
+    Повторяет get_elided_page_range из Django 3.2.
+    """
+    ELLIPSIS = '…'
+
+    def _get_page(self, *args, **kwargs):
+        return ElidedPage(*args, **kwargs)
+
+    def get_elided_page_range(self, number=1, *, on_each_side=3, on_ends=2):
+        number = self.validate_number(number)
+        if self.num_pages <= (on_each_side + on_ends) * 2:
+            yield from self.page_range
+            return
+        if number > (1 + on_each_side + on_ends) + 1:
+            yield from range(1, on_ends + 1)
+            yield self.ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+        if number < (self.num_pages - on_each_side - on_ends) - 1:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield self.ELLIPSIS
+            yield from range(self.num_pages - on_ends + 1, self.num_pages + 1)
+        else:
+            yield from range(number + 1, self.num_pages + 1)
+
+
+class CursorPage(ElidedPage):
+    """Страница, умеющая отдавать курсоры на соседние страницы.
+
+    Страницы, полученные по курсору, не имеют номера: наличие
+    соседних страниц определяется по лишней записи в выборке,
+    а не через COUNT(*).
+    """
+
+    def __init__(self, object_list, number, paginator,
+                 has_next=None, has_previous=None):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    @property
+    def is_cursor(self):
+        return self.number is None
+
+    def has_next(self):
+        if self._has_next is None:
+            return super().has_next()
+        return self._has_next
+
+    def has_previous(self):
+        if self._has_previous is None:
+            return super().has_previous()
+        return self._has_previous
+
+    @cached_property
+    def next_cursor(self):
+        if self.has_next() and len(self):
+            return encode_cursor(self[len(self) - 1], FORWARD)
+        return None
+
+    @cached_property
+    def previous_cursor(self):
+        if self.has_previous() and len(self):
+            return encode_cursor(self[0], BACKWARD)
+        return None
+
+
+class CursorPaginator(ElidedPaginator):
+    """Пагинатор ленты записей по ключу (pub_date, id).
+
+    Обычные номера страниц (?page=N) по-прежнему работают через
+    LIMIT/OFFSET, а переход по курсору (?cursor=...) выполняется
+    поиском по индексу и стоит одинаково на любой глубине ленты.
+    """
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list.order_by(*ORDERING), per_page, **kwargs)
+        if count is not None:
+            # Заранее известное число записей избавляет от COUNT(*).
+            self.count = count
+
+    def _get_page(self, *args, **kwargs):
+        return CursorPage(*args, **kwargs)
+
+    def get_first_page(self):
+        """Первая страница без подсчёта записей: наличие следующей
+        определяется по лишней записи в выборке."""
+        posts = list(self.object_list[:self.per_page + 1])
+        return CursorPage(posts[:self.per_page], None, self,
+                          has_next=len(posts) > self.per_page,
+                          has_previous=False)
+
+    def get_cursor_page(self, cursor):
+        """Страница до или после записи, на которую указывает курсор.
+
+        Как и get_page(), при некорректном курсоре возвращает первую
+        страницу вместо ошибки.
+        """
+        try:
+            direction, pub_date, pk = decode_cursor(cursor)
+        except InvalidCursor:
+            return self.get_page(1)
+        if direction == FORWARD:
+            queryset = self.object_list.filter(
+                Q(pub_date__lt=pub_date) | Q(pk__lt=pk),
+                pub_date__lte=pub_date,
+            )
+        else:
+            queryset = self.object_list.filter(
+                Q(pub_date__gt=pub_date) | Q(pk__gt=pk),
+                pub_date__gte=pub_date,
+            ).reverse()
+        posts = list(queryset[:self.per_page + 1])
+        has_more = len(posts) > self.per_page
+        posts = posts[:self.per_page]
+        if direction == FORWARD:
+            return CursorPage(posts, None, self,
+                              has_next=has_more, has_previous=True)
+        if not posts:
+            return self.get_first_page()
+        posts.reverse()
+        return CursorPage(posts, None, self,
+                          has_next=True, has_previous=has_more)
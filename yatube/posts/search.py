@@ -0,0 +1,159 @@
+import re
+
+from django.conf import settings
+from django.db import connections, router
+from django.utils.functional import cached_property
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Post
+
+FTS_TABLE = 'posts_post_fts'
+MAX_TERMS = 10
+SNIPPET_WORDS = 24
+# Маркеры подсветки: заменяются на <mark> уже после экранирования текста.
+MARK_START = '\x02'
+MARK_END = '\x03'
+
+FTS_TRIGGERS = (
+    f'''CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai
+        AFTER INSERT ON posts_post BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+        END''',
+    f'''CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad
+        AFTER DELETE ON posts_post BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+            VALUES ('delete', old.id, old.text);
+        END''',
+    f'''CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+        AFTER UPDATE OF text ON posts_post BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+            VALUES ('delete', old.id, old.text);
+            INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+        END''',
+)
+
+
+def restore_fts_triggers(using):
+    """SQLite пересоздаёт таблицу при изменении её полей и теряет
+    триггеры, поэтому после миграций они восстанавливаются."""
+    db = connections[using]
+    if db.vendor != 'sqlite':
+        return
+    if FTS_TABLE not in db.introspection.table_names():
+        return
+    with db.cursor() as cursor:
+        for trigger in FTS_TRIGGERS:
+            cursor.execute(trigger)
+
+
+def match_expression(query):
+    """Запрос пользователя в виде выражения FTS5: все слова обязательны,
+    синтаксис FTS5 из ввода не интерпретируется."""
+    terms = re.findall(r'\w+', query)[:MAX_TERMS]
+    return ' '.join(f'"{term}"' for term in terms)
+
+
+def highlight(snippet):
+    return mark_safe(
+        escape(snippet)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
+
+
+class SearchResults:
+    """Найденные записи в порядке релевантности (bm25).
+
+    Ранжируются только SEARCH_MAX_RESULTS самых новых совпадений: их
+    граница находится по rowid, а FTS5 читает диапазон rowid, не
+    перебирая остальные совпадения. Поэтому и подсчёт, и каждая
+    страница стоят не больше, чем ранжирование SEARCH_MAX_RESULTS
+    записей, сколько бы их ни нашлось.
+
+    Поддерживает count() и срезы, поэтому подходит для Paginator:
+    каждая страница — один запрос к индексу FTS5 и один к posts_post.
+    """
+
+    def __init__(self, expression):
+        self.expression = expression
+        self.limit = settings.SEARCH_MAX_RESULTS
+
+    @property
+    def db(self):
+        return connections[router.db_for_read(Post)]
+
+    @cached_property
+    def first_rowid(self):
+        """Наименьший rowid среди ранжируемых совпадений."""
+        with self.db.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY rowid DESC LIMIT 1 OFFSET %s',
+                [self.expression, self.limit - 1],
+            )
+            row = cursor.fetchone()
+        return row[0] if row else 0
+
+    @cached_property
+    def capped(self):
+        """Найдено больше, чем ранжируется."""
+        if not self.first_rowid:
+            return False
+        with self.db.cursor() as cursor:
+            cursor.execute(
+                f'SELECT 1 FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'AND rowid < %s LIMIT 1',
+                [self.expression, self.first_rowid],
+            )
+            return cursor.fetchone() is not None
+
+    def count(self):
+        with self.db.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s AND rowid >= %s',
+                [self.expression, self.first_rowid],
+            )
+            return cursor.fetchone()[0]
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start = key.start or 0
+        with self.db.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid, snippet({FTS_TABLE}, 0, %s, %s, %s, %s) '
+                f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'AND rowid >= %s ORDER BY rank LIMIT %s OFFSET %s',
+                [MARK_START, MARK_END, '…', SNIPPET_WORDS,
+                 self.expression, self.first_rowid, key.stop - start, start],
+            )
+            snippets = dict(cursor.fetchall())
+        posts = Post.objects.using(self.db.alias).select_related(
+            'author', 'group').in_bulk(list(snippets))
+        results = []
+        for pk, snippet in snippets.items():
+            if pk in posts:
+                posts[pk].snippet = highlight(snippet)
+                results.append(posts[pk])
+        return results
+
+
+def search_posts(query):
+    """Записи, содержащие все слова запроса.
+
+    На SQLite поиск идёт по индексу FTS5, на других СУБД — через
+    icontains по каждому слову. В обоих случаях результатов не больше
+    SEARCH_MAX_RESULTS.
+    """
+    expression = match_expression(query)
+    if not expression:
+        return Post.objects.none()
+    results = SearchResults(expression)
+    if results.db.vendor == 'sqlite':
+        return results
+    post_list = Post.objects.feed('author', 'group')
+    for term in re.findall(r'\w+', query)[:MAX_TERMS]:
+        post_list = post_list.filter(text__icontains=term)
+    return post_list[:settings.SEARCH_MAX_RESULTS]
@@ -0,0 +1,138 @@
+from django.db import transaction
+from django.db.models.signals import (post_delete, post_init, post_migrate,
+                                      post_save, pre_delete)
+from django.dispatch import receiver
+
+from core import anonymous
+
+from . import groups, images, timeline
+from .models import Follow, Group, Post, PostCounter, User
+from .search import restore_fts_triggers
+
+# Поля автора, которые показывают ленты.
+AUTHOR_NAME_FIELDS = ('username', 'first_name', 'last_name')
+
+
+@receiver(post_init, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    # Через __dict__, чтобы не подгружать отложенное поле.
+    instance._saved_group_id = instance.__dict__.get('group_id')
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    saved_group_id = instance._saved_group_id
+    instance._saved_group_id = instance.group_id
+    if created:
+        PostCounter.objects.shift(instance.counter_keys(), 1)
+        groups.note_post(instance)
+        timeline.fan_out(instance)
+        return
+    PostCounter.objects.shift(instance.counter_keys())
+    if saved_group_id != instance.group_id:
+        if saved_group_id is not None:
+            PostCounter.objects.shift(
+                [PostCounter.group_key(saved_group_id)], -1)
+        if instance.group_id is not None:
+            PostCounter.objects.shift(
+                [PostCounter.group_key(instance.group_id)], 1)
+        groups.note_post(instance)
+        timeline.resync(instance)
+
+
+@receiver(post_save, sender=Post)
+def schedule_thumbnails(sender, instance, **kwargs):
+    if instance.image:
+        name = instance.image.name
+        transaction.on_commit(lambda: images.schedule(name))
+
+
+@receiver(images.variants_created)
+def variants_created(sender, name, **kwargs):
+    # Ленты с заглушкой вместо картинки рендерятся заново.
+    keys = set()
+    for post in Post.objects.filter(image=name).only('author', 'group'):
+        keys.update(post.counter_keys())
+    PostCounter.objects.shift(keys)
+    anonymous.clear()
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    PostCounter.objects.shift(instance.counter_keys(), -1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def forget_public_pages(sender, **kwargs):
+    # Остальные процессы увидят изменения через ANONYMOUS_CACHE_TIMEOUT.
+    anonymous.clear()
+
+
+@receiver(post_delete, sender=Group)
+def drop_group_counter(sender, instance, **kwargs):
+    PostCounter.objects.filter(
+        key=PostCounter.group_key(instance.pk)).delete()
+
+
+def touch_feeds(posts, *keys):
+    """Отмечает изменение лент keys, общей ленты и лент авторов posts."""
+    author_ids = posts.order_by().values_list('author', flat=True).distinct()
+    PostCounter.objects.touch([
+        PostCounter.INDEX, *keys,
+        *(PostCounter.author_key(pk) for pk in author_ids),
+    ])
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    # До удаления: потом записи группы уже не найти.
+    touch_feeds(instance.posts.all(), PostCounter.group_key(instance.pk))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def forget_groups(sender, **kwargs):
+    groups.invalidate()
+
+
+def author_name(user):
+    # Через __dict__, чтобы не подгружать отложенные поля.
+    return tuple(user.__dict__.get(field) for field in AUTHOR_NAME_FIELDS)
+
+
+@receiver(post_init, sender=User)
+def remember_author_name(sender, instance, **kwargs):
+    instance._saved_author_name = author_name(instance)
+
+
+@receiver(post_save, sender=User)
+def author_saved(sender, instance, created, **kwargs):
+    name = author_name(instance)
+    if not created and name != instance._saved_author_name:
+        group_ids = (
+            instance.posts.filter(group__isnull=False).order_by()
+            .values_list('group', flat=True).distinct())
+        PostCounter.objects.touch([
+            PostCounter.INDEX, PostCounter.author_key(instance.pk),
+            *(PostCounter.group_key(pk) for pk in group_ids),
+        ])
+    instance._saved_author_name = name
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        timeline.backfill(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    timeline.prune(instance)
+
+
+@receiver(post_migrate)
+def restore_search_triggers(sender, using, **kwargs):
+    if sender.name == 'posts':
+        restore_fts_triggers(using)
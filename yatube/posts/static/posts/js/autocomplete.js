@@ -0,0 +1,35 @@
+// Подгружает варианты для <select data-autocomplete-url> по мере ввода.
+document.addEventListener('DOMContentLoaded', function () {
+  document.querySelectorAll('select[data-autocomplete-url]').forEach(function (select) {
+    var input = document.createElement('input');
+    var timer = null;
+    input.type = 'search';
+    input.className = 'form-control mb-2';
+    input.placeholder = 'Начните вводить название группы';
+    select.parentNode.insertBefore(input, select);
+
+    function load() {
+      var url = select.dataset.autocompleteUrl + '?q=' + encodeURIComponent(input.value);
+      fetch(url).then(function (response) {
+        return response.json();
+      }).then(function (data) {
+        var keep = Array.prototype.filter.call(select.options, function (option) {
+          return option.value === '' || option.selected;
+        });
+        select.innerHTML = '';
+        keep.forEach(function (option) { select.appendChild(option); });
+        data.results.forEach(function (item) {
+          if (String(item.id) === select.value) {
+            return;
+          }
+          select.appendChild(new Option(item.text, item.id));
+        });
+      });
+    }
+
+    input.addEventListener('input', function () {
+      clearTimeout(timer);
+      timer = setTimeout(load, 250);
+    });
+  });
+});
@@ -0,0 +1,12 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from posts import cache
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_card(post):
+    """Карточка записи в ленте, см. posts.cache.render_card."""
+    return mark_safe(cache.render_card(post))
@@ -0,0 +1,42 @@
+from django.test import TestCase
+
+from ..benchmark import compare, measure, seed
+from ..models import Group, Post, User
+
+
+class BenchmarkTests(TestCase):
+    def test_seed_and_measure(self):
+        """Заполнение базы и замеры по всем сценариям."""
+        seed(posts=30, users=3, groups=2, batch_size=7)
+        self.assertEqual(Post.objects.count(), 30)
+        self.assertEqual(User.objects.count(), 3)
+        self.assertEqual(Group.objects.count(), 2)
+        results = measure(requests=2)
+        self.assertEqual(set(results), {
+            'index', 'index_deep_page', 'index_deep_cursor', 'group_posts',
+            'profile', 'post_detail', 'search', 'search_last_page',
+            'post_create',
+        })
+        for result in results.values():
+            self.assertEqual(
+                set(result), {'p50_ms', 'p95_ms', 'queries', 'peak_kb'})
+
+    def test_repeated_runs_reuse_database(self):
+        """Повторный запуск на той же базе не заполняет её заново,
+        а записи сценария post_create не остаются в ней."""
+        self.assertTrue(seed(posts=20, users=2, groups=2))
+        measure(requests=2)
+        self.assertFalse(seed(posts=20, users=2, groups=2))
+        measure(requests=2)
+        self.assertEqual(Post.objects.count(), 20)
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(Group.objects.count(), 2)
+
+    def test_compare(self):
+        """Сравнение с базовой линией находит рост задержки и запросов."""
+        baseline = {'index': {'p95_ms': 10, 'queries': 3}}
+        self.assertEqual(
+            compare(baseline, {'index': {'p95_ms': 12, 'queries': 3}}, 0.25),
+            [])
+        self.assertEqual(len(compare(
+            baseline, {'index': {'p95_ms': 13, 'queries': 4}}, 0.25)), 2)
@@ -0,0 +1,277 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import cache
+from ..models import Group, Post, PostCounter
+
+User = get_user_model()
+
+
+@override_settings(POSTS_PAGE_CACHE=True)
+class FeedPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тестовое название группы',
+            slug='test-slug',
+            description='Тестовое описание группы',
+        )
+        cls.another_group = Group.objects.create(
+            title='Другая группа',
+            slug='another-slug',
+            description='Описание другой группы',
+        )
+        cls.user_author = User.objects.create_user(username='user_author')
+        cls.post = Post.objects.create(
+            text='Текст поста',
+            author=cls.user_author,
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.get_cache().clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user_author)
+        self.index = reverse('posts:index')
+        self.group_page = reverse(
+            'posts:group_list', kwargs={'slug': self.group.slug})
+        self.another_group_page = reverse(
+            'posts:group_list', kwargs={'slug': self.another_group.slug})
+        self.profile = reverse(
+            'posts:profile', kwargs={'username': self.user_author.username})
+
+    def test_second_request_is_served_from_cache(self):
+        """Повторный запрос ленты отдаётся из кэша."""
+        for url in (self.index, self.group_page, self.profile):
+            with self.subTest(url=url):
+                first = self.guest_client.get(url)
+                second = self.guest_client.get(url)
+                self.assertEqual(first['X-Cache'], 'MISS')
+                self.assertEqual(second['X-Cache'], 'HIT')
+                self.assertEqual(first.content, second.content)
+
+    def test_cache_key_depends_on_viewer_and_page(self):
+        """Кэш различает гостя, пользователя и страницу ленты."""
+        self.guest_client.get(self.index)
+        response = self.authorized_client.get(self.index)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertContains(response, self.user_author.username)
+        response = self.guest_client.get(self.index, {'page': 2})
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    def test_new_post_invalidates_affected_feeds(self):
+        """Новая запись сбрасывает только затронутые ленты."""
+        urls = (self.index, self.group_page,
+                self.another_group_page, self.profile)
+        for url in urls:
+            self.guest_client.get(url)
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Свежий пост', 'group': self.group.id},
+        )
+        expected = (
+            (self.index, 'MISS'),
+            (self.group_page, 'MISS'),
+            (self.another_group_page, 'HIT'),
+            (self.profile, 'MISS'),
+        )
+        for url, state in expected:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response['X-Cache'], state)
+        self.assertContains(self.guest_client.get(self.index), 'Свежий пост')
+
+    def test_edit_invalidates_old_and_new_group(self):
+        """Перенос записи в другую группу сбрасывает обе ленты групп."""
+        self.guest_client.get(self.group_page)
+        self.guest_client.get(self.another_group_page)
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
+            data={'text': 'Другой текст', 'group': self.another_group.id},
+        )
+        response = self.guest_client.get(self.group_page)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertNotContains(response, 'Другой текст')
+        response = self.guest_client.get(self.another_group_page)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertContains(response, 'Другой текст')
+
+    def test_cache_stats(self):
+        """Счётчики попаданий доступны персоналу."""
+        self.guest_client.get(self.index)
+        self.guest_client.get(self.index)
+        url = reverse('posts:cache_stats')
+        self.assertEqual(self.authorized_client.get(url).status_code, 302)
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        self.authorized_client.force_login(staff)
+        stats = self.authorized_client.get(url).json()
+        self.assertGreaterEqual(stats['hits'], 1)
+        self.assertGreaterEqual(stats['misses'], 1)
+
+
+class PostFragmentCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_author = User.objects.create_user(username='user_author')
+        cls.post = Post.objects.create(
+            text='Текст поста', author=cls.user_author)
+
+    def setUp(self):
+        cache.get_cache().clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user_author)
+
+    def test_list_fragment_is_cached_per_post(self):
+        """Фрагмент записи в ленте рендерится один раз до её правки."""
+        pages = (
+            reverse('posts:index'),
+            reverse('posts:profile',
+                    kwargs={'username': self.user_author.username}),
+        )
+        self.authorized_client.get(pages[0])
+        for page in pages:
+            with self.subTest(page=page):
+                response = self.authorized_client.get(page)
+                self.assertContains(response, self.post.text)
+                self.assertTemplateNotUsed(
+                    response, 'posts/includes/post_for_list.html')
+
+    def test_edit_refreshes_fragment(self):
+        """Правка записи даёт новый фрагмент в ленте."""
+        self.authorized_client.get(reverse('posts:index'))
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
+            data={'text': 'Исправленный текст'},
+        )
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Исправленный текст')
+        self.assertNotContains(response, 'Текст поста')
+
+    def test_fragment_uses_posts_cache_alias(self):
+        """Карточки лежат в кэше POSTS_CACHE_ALIAS, как и страницы."""
+        self.authorized_client.get(reverse('posts:index'))
+        post = Post.objects.feed('author', 'group').get(pk=self.post.pk)
+        self.assertIn(self.post.text, cache.get_cache().get(
+            cache.card_key(post)))
+
+    def test_author_and_group_changes_refresh_fragment(self):
+        """Имя автора и группа записи входят в ключ фрагмента."""
+        group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.filter(pk=self.post.pk).update(group=group)
+        url = reverse('posts:index')
+        self.assertContains(self.authorized_client.get(url), '/group/group/')
+        self.user_author.first_name = 'Лев'
+        self.user_author.last_name = 'Толстой'
+        self.user_author.save()
+        self.assertContains(self.authorized_client.get(url), 'Лев Толстой')
+        group.delete()
+        self.assertNotContains(
+            self.authorized_client.get(url), '/group/group/')
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_author = User.objects.create_user(username='user_author')
+        cls.post = Post.objects.create(
+            text='Текст поста', author=cls.user_author)
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user_author)
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:profile',
+                    kwargs={'username': self.user_author.username}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+        )
+
+    def settle(self):
+        """Переносит последние изменения в прошлую секунду."""
+        for url in self.urls:
+            self.guest_client.get(url)
+        past = timezone.now() - timedelta(minutes=1)
+        PostCounter.objects.update(modified=past)
+        Post.objects.update(edited=past)
+
+    def test_unchanged_pages_answer_not_modified(self):
+        """Неизменившиеся страницы отвечают 304 без рендеринга."""
+        self.settle()
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                etag = response['ETag']
+                last_modified = response['Last-Modified']
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.templates, [])
+                response = self.guest_client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=last_modified)
+                self.assertEqual(response.status_code, 304)
+
+    def test_changes_invalidate_etag(self):
+        """Новая запись и правка меняют валидатор страниц."""
+        etags = {url: self.guest_client.get(url)['ETag'] for url in self.urls}
+        self.authorized_client.post(
+            reverse('posts:post_create'), data={'text': 'Новый пост'})
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_viewer(self):
+        """Гость и автор получают разные валидаторы."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertNotEqual(
+                    self.guest_client.get(url)['ETag'],
+                    self.authorized_client.get(url)['ETag'],
+                )
+
+    def test_no_last_modified_within_current_second(self):
+        """Пока секунда изменения не прошла, Last-Modified не отдаётся,
+        и запись в ту же секунду не прячется за ответом 304."""
+        url = self.urls[0]
+        self.settle()
+        last_modified = self.guest_client.get(url)['Last-Modified']
+        Post.objects.create(text='Ещё пост', author=self.user_author)
+        response = self.guest_client.get(url)
+        self.assertFalse(response.has_header('Last-Modified'))
+        response = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Ещё пост')
+
+    def test_group_and_author_changes_invalidate_etag(self):
+        """Переименование группы и автора меняет валидаторы лент."""
+        group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.create(
+            text='Пост группы', author=self.user_author, group=group)
+        group_url = reverse('posts:group_list', kwargs={'slug': group.slug})
+        urls = (group_url, *self.urls)
+        etags = {url: self.guest_client.get(url)['ETag'] for url in urls}
+        group.title = 'Новое название'
+        group.save()
+        response = self.guest_client.get(
+            group_url, HTTP_IF_NONE_MATCH=etags[group_url])
+        self.assertContains(response, 'Новое название')
+        etags = {url: self.guest_client.get(url)['ETag'] for url in urls}
+        self.user_author.first_name = 'Лев'
+        self.user_author.last_name = 'Толстой'
+        self.user_author.save()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertContains(response, 'Лев Толстой')
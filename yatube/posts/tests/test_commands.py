@@ -0,0 +1,171 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from ..models import Follow, Group, Post, PostCounter
+
+User = get_user_model()
+
+
+class ImportExportCommandsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тестовое название группы',
+            slug='test-slug',
+            description='Тестовое описание группы',
+        )
+        cls.user_author = User.objects.create_user(username='user_author')
+        cls.post = Post.objects.create(
+            text='Пост, "с кавычками", и запятыми',
+            author=cls.user_author,
+            group=cls.group,
+        )
+        Post.objects.create(text='Пост без группы', author=cls.user_author)
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def export(self, name, *args):
+        path = os.path.join(self.tmp_dir.name, name)
+        call_command('export_posts', path, *args, stdout=StringIO())
+        return path
+
+    def test_export_jsonl(self):
+        """Выгрузка JSONL содержит по строке на запись."""
+        path = self.export('posts.jsonl', '--chunk-size', '1')
+        with open(path, encoding='utf-8') as file:
+            rows = [json.loads(line) for line in file]
+        self.assertEqual(rows[0], {
+            'text': self.post.text,
+            'pub_date': self.post.pub_date.isoformat(),
+            'author': self.user_author.username,
+            'group': self.group.slug,
+        })
+        self.assertEqual(rows[1]['group'], '')
+
+    def test_roundtrip(self):
+        """Выгруженные записи загружаются обратно с теми же полями."""
+        fields = ('text', 'pub_date', 'author', 'group')
+        for name in ('posts.jsonl', 'posts.csv'):
+            with self.subTest(name=name):
+                path = self.export(name)
+                before = list(Post.objects.order_by('pk').values(*fields))
+                out = StringIO()
+                call_command('import_posts', path, '--batch-size', '1',
+                             stdout=out)
+                self.assertIn('Загружено записей: 2', out.getvalue())
+                after = list(
+                    Post.objects.order_by('pk').values(*fields))
+                self.assertEqual(after, before + before)
+                Post.objects.filter(pk__in=Post.objects.order_by(
+                    '-pk').values_list('pk', flat=True)[:2]).delete()
+
+    def test_import_skips_unknown_author_and_group(self):
+        """Строки с неизвестным автором или группой пропускаются,
+        счётчики лент пересчитываются."""
+        PostCounter.objects.get_count(PostCounter.INDEX, Post.objects)
+        path = os.path.join(self.tmp_dir.name, 'posts.jsonl')
+        with open(path, 'w', encoding='utf-8') as file:
+            for author, group in (('user_author', 'test-slug'),
+                                  ('nobody', ''),
+                                  ('user_author', 'no-group')):
+                file.write(json.dumps(
+                    {'text': 'Текст', 'author': author, 'group': group}
+                ) + '\n')
+        out = StringIO()
+        call_command('import_posts', path, stdout=out, stderr=StringIO())
+        self.assertIn('Загружено записей: 1, пропущено: 2', out.getvalue())
+        self.assertEqual(
+            PostCounter.objects.get_count(PostCounter.INDEX, Post.objects),
+            3)
+
+    def test_import_skips_broken_rows(self):
+        """Строки без автора и неразобранный JSON пропускаются с номером
+        строки, остальные загружаются."""
+        path = os.path.join(self.tmp_dir.name, 'posts.jsonl')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(json.dumps(
+                {'text': 'Без группы', 'author': 'user_author'}) + '\n')
+            file.write('{"text": "оборванная строка\n')
+            file.write(json.dumps({'text': 'Без автора'}) + '\n')
+            file.write('[1, 2]\n')
+            file.write(json.dumps({'text': 'Дата', 'author': 'user_author',
+                                   'pub_date': '2020-13-45T00:00:00'}) + '\n')
+        out, err = StringIO(), StringIO()
+        call_command('import_posts', path, stdout=out, stderr=err)
+        self.assertIn('Загружено записей: 1, пропущено: 4', out.getvalue())
+        for number in (2, 3, 4, 5):
+            with self.subTest(number=number):
+                self.assertIn(f'Пропущена строка {number}:', err.getvalue())
+        self.assertTrue(Post.objects.filter(
+            text='Без группы', group__isnull=True).exists())
+
+    def test_import_fills_follower_timelines(self):
+        """Загруженные записи попадают в ленты подписчиков автора
+        и группы."""
+        author_follower = User.objects.create_user(username='reader')
+        group_follower = User.objects.create_user(username='group_reader')
+        Follow.objects.create(user=author_follower, author=self.user_author)
+        Follow.objects.create(user=group_follower, group=self.group)
+        path = os.path.join(self.tmp_dir.name, 'posts.jsonl')
+        with open(path, 'w', encoding='utf-8') as file:
+            for text, group in (('Импорт 1', 'test-slug'), ('Импорт 2', '')):
+                file.write(json.dumps({'text': text, 'author': 'user_author',
+                                       'group': group}) + '\n')
+        call_command('import_posts', path, '--batch-size', '1',
+                     stdout=StringIO())
+        expected = (
+            (author_follower, ['Импорт 1', 'Импорт 2']),
+            (group_follower, ['Импорт 1']),
+        )
+        for user, texts in expected:
+            with self.subTest(user=user.username):
+                timeline = user.timeline.filter(
+                    post__text__startswith='Импорт')
+                self.assertEqual(
+                    sorted(timeline.values_list('post__text', flat=True)),
+                    texts)
+
+    def test_import_rejects_non_positive_sizes(self):
+        """Нулевые --batch-size и --progress отклоняются сразу."""
+        path = self.export('posts.jsonl')
+        for option in ('--batch-size', '--progress'):
+            with self.subTest(option=option):
+                with self.assertRaisesMessage(CommandError, option):
+                    call_command('import_posts', path, option, '0',
+                                 stdout=StringIO())
+
+    def test_import_keeps_dates_of_large_batches(self):
+        """Большая пачка сохраняет даты строк, а имена авторов
+        запрашиваются порциями в пределах лимита параметров SQLite."""
+        User.objects.bulk_create(
+            User(username=f'author_{num}') for num in range(1000))
+        path = os.path.join(self.tmp_dir.name, 'posts.jsonl')
+        with open(path, 'w', encoding='utf-8') as file:
+            for num in range(1000):
+                file.write(json.dumps({
+                    'text': f'Запись {num}',
+                    'pub_date': f'2020-01-01T00:00:{num % 60:02}+00:00',
+                    'author': f'author_{num}',
+                }) + '\n')
+        with CaptureQueriesContext(connection) as queries:
+            call_command('import_posts', path, stdout=StringIO())
+        lookups = [query['sql'] for query in queries.captured_queries
+                   if 'FROM "auth_user"' in query['sql']]
+        self.assertEqual(len(lookups), 2)
+        post = Post.objects.get(text='Запись 61')
+        self.assertEqual(post.pub_date.isoformat(),
+                         '2020-01-01T00:00:01+00:00')
+        self.assertEqual(post.edited, post.pub_date)
+        self.assertEqual(post.author.username, 'author_61')
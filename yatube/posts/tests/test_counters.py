@@ -0,0 +1,134 @@
+import io
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Group, Post, PostCounter
+
+User = get_user_model()
+
+
+class PostCounterTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тестовое название группы',
+            slug='test-slug',
+            description='Тестовое описание группы',
+        )
+        cls.another_group = Group.objects.create(
+            title='Другая группа',
+            slug='another-slug',
+            description='Описание другой группы',
+        )
+        cls.user_author = User.objects.create_user(username='user_author')
+        cls.post = Post.objects.create(
+            text='Текст поста',
+            author=cls.user_author,
+            group=cls.group,
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user_author)
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:group_list',
+                    kwargs={'slug': self.another_group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': self.user_author.username}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+        )
+        for url in self.urls:
+            self.authorized_client.get(url)
+
+    def get_counts(self):
+        keys = (
+            PostCounter.INDEX,
+            PostCounter.author_key(self.user_author.pk),
+            PostCounter.group_key(self.group.pk),
+            PostCounter.group_key(self.another_group.pk),
+        )
+        counters = dict(
+            PostCounter.objects.filter(key__in=keys)
+            .values_list('key', 'count'))
+        return tuple(counters[key] for key in keys)
+
+    def test_pages_do_not_count_posts(self):
+        """Страницы берут число записей из счётчиков, без COUNT(*)."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as context:
+                    self.authorized_client.get(url)
+                self.assertFalse([
+                    query['sql'] for query in context.captured_queries
+                    if 'COUNT(' in query['sql']
+                ])
+
+    def test_counters_follow_create_edit_delete(self):
+        """Счётчики меняются при создании, смене группы и удалении."""
+        self.assertEqual(self.get_counts(), (1, 1, 1, 0))
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Новый пост', 'group': self.group.id},
+        )
+        self.assertEqual(self.get_counts(), (2, 2, 2, 0))
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
+            data={'text': 'Другой текст', 'group': self.another_group.id},
+        )
+        self.assertEqual(self.get_counts(), (2, 2, 1, 1))
+        Post.objects.get(pk=self.post.pk).delete()
+        self.assertEqual(self.get_counts(), (1, 1, 1, 0))
+        response = self.authorized_client.get(reverse(
+            'posts:profile', kwargs={'username': self.user_author.username}))
+        self.assertEqual(response.context['count_post'], 1)
+
+    def test_drifted_counter_does_not_break_delete(self):
+        """Удаление не падает на счётчике, ушедшем в ноль, а команда
+        recount_posts восстанавливает точные значения."""
+        PostCounter.objects.update(count=0)
+        Post.objects.get(pk=self.post.pk).delete()
+        self.assertEqual(self.get_counts(), (0, 0, 0, 0))
+        Post.objects.bulk_create([
+            Post(text='Без сигналов', author=self.user_author,
+                 group=self.another_group),
+        ])
+        out = io.StringIO()
+        call_command('recount_posts', stdout=out)
+        self.assertIn('Исправлено счётчиков: 3', out.getvalue())
+        self.assertEqual(self.get_counts(), (1, 1, 0, 1))
+
+    def test_touch_is_limited_to_affected_feeds(self):
+        """Правка группы или имени автора отмечает только ленты, где
+        они видны."""
+        other = User.objects.create_user(username='other')
+        past = timezone.now() - timedelta(days=1)
+        keys = (PostCounter.INDEX, PostCounter.author_key(self.user_author.pk),
+                PostCounter.group_key(self.group.pk))
+        untouched = (PostCounter.group_key(self.another_group.pk),
+                     PostCounter.author_key(other.pk))
+        PostCounter.objects.get_counter(untouched[1], other.posts)
+        for change in ('group', 'author'):
+            with self.subTest(change=change):
+                PostCounter.objects.update(modified=past)
+                if change == 'group':
+                    self.group.title = 'Новое название'
+                    self.group.save()
+                else:
+                    self.user_author.first_name = 'Лев'
+                    self.user_author.save()
+                modified = dict(
+                    PostCounter.objects.values_list('key', 'modified'))
+                for key in keys:
+                    self.assertGreater(modified[key], past)
+                for key in untouched:
+                    self.assertEqual(modified[key], past)
@@ -0,0 +1,84 @@
+import csv
+import gzip
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..export import encode_blocks
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class ProfileExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тестовое название группы',
+            slug='test-slug',
+            description='Тестовое описание группы',
+        )
+        cls.user_author = User.objects.create_user(username='user_author')
+        cls.another_user = User.objects.create_user(username='another')
+        Post.objects.create(text='Чужой пост', author=cls.another_user)
+        cls.posts = [
+            Post.objects.create(
+                text=f'Текст поста {num}',
+                author=cls.user_author,
+                group=cls.group if num % 2 else None,
+            )
+            for num in range(5)
+        ]
+        cls.url = reverse(
+            'posts:profile_export',
+            kwargs={'username': cls.user_author.username})
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user_author)
+
+    def download(self, **params):
+        response = self.authorized_client.get(self.url, params)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_jsonl_export(self):
+        """Автор получает все свои записи в JSONL."""
+        response, content = self.download()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertIn('user_author-posts.jsonl',
+                      response['Content-Disposition'])
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual(
+            [row['text'] for row in rows],
+            [post.text for post in self.posts])
+        self.assertEqual(rows[1]['group'], self.group.slug)
+
+    def test_gzip_csv_export(self):
+        """CSV сжимается на лету."""
+        response, content = self.download(format='csv', gzip=1)
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('.csv.gz', response['Content-Disposition'])
+        rows = list(csv.DictReader(
+            io.StringIO(gzip.decompress(content).decode())))
+        self.assertEqual(len(rows), len(self.posts))
+        self.assertEqual(rows[0]['author'], self.user_author.username)
+
+    def test_only_author_can_export(self):
+        """Чужие записи выгрузить нельзя."""
+        guest = self.client.get(self.url)
+        self.assertRedirects(
+            guest, f'{reverse("users:login")}?next={self.url}')
+        self.authorized_client.force_login(self.another_user)
+        response = self.authorized_client.get(self.url)
+        self.assertRedirects(response, reverse(
+            'posts:profile', kwargs={'username': self.user_author.username}))
+
+    def test_encode_blocks(self):
+        """Строки объединяются в блоки не меньше заданного размера."""
+        blocks = list(encode_blocks(['ab\n'] * 5, block_size=6))
+        self.assertEqual(blocks, [b'ab\nab\n', b'ab\nab\n', b'ab\n'])
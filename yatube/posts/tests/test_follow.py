@@ -0,0 +1,133 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Follow, Group, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class FollowTimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тестовое название группы',
+            slug='test-slug',
+            description='Тестовое описание группы',
+        )
+        cls.another_group = Group.objects.create(
+            title='Другая группа',
+            slug='another-slug',
+            description='Описание другой группы',
+        )
+        cls.user_author = User.objects.create_user(username='user_author')
+        cls.user_reader = User.objects.create_user(username='user_reader')
+        cls.post = Post.objects.create(
+            text='Старый пост автора', author=cls.user_author)
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.user_author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.user_reader)
+
+    def timeline(self):
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        return [entry.post for entry in response.context['page_obj']]
+
+    def follow_author(self):
+        self.reader_client.get(reverse(
+            'posts:profile_follow',
+            kwargs={'username': self.user_author.username}))
+
+    def test_follow_and_unfollow_author(self):
+        """Подписка добавляет записи автора в ленту, отписка убирает."""
+        self.follow_author()
+        self.assertTrue(Follow.objects.filter(
+            user=self.user_reader, author=self.user_author).exists())
+        self.assertEqual(self.timeline(), [self.post])
+        self.reader_client.get(reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': self.user_author.username}))
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(self.timeline(), [])
+
+    def test_cannot_follow_self(self):
+        """На себя подписаться нельзя."""
+        self.author_client.get(reverse(
+            'posts:profile_follow',
+            kwargs={'username': self.user_author.username}))
+        self.assertFalse(Follow.objects.exists())
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новая запись попадает в ленты подписчиков автора и группы
+        один раз и не попадает к остальным."""
+        self.follow_author()
+        self.reader_client.get(reverse(
+            'posts:group_follow', kwargs={'slug': self.group.slug}))
+        stranger = User.objects.create_user(username='stranger')
+        self.author_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Новый пост', 'group': self.group.id},
+        )
+        new_post = Post.objects.get(text='Новый пост')
+        self.assertEqual(self.timeline(), [new_post, self.post])
+        self.assertFalse(TimelineEntry.objects.filter(user=stranger).exists())
+
+    def test_group_change_and_unfollow_keep_timeline_in_sync(self):
+        """Смена группы и отписка от группы обновляют ленту, не трогая
+        записи подписанных авторов."""
+        self.reader_client.get(reverse(
+            'posts:group_follow', kwargs={'slug': self.group.slug}))
+        other_author = User.objects.create_user(username='other_author')
+        group_post = Post.objects.create(
+            text='Пост в группе', author=other_author, group=self.group)
+        self.assertEqual(self.timeline(), [group_post])
+        group_post.group = self.another_group
+        group_post.save()
+        self.assertEqual(self.timeline(), [])
+        self.follow_author()
+        Post.objects.create(
+            text='Пост автора в группе', author=self.user_author,
+            group=self.group)
+        self.reader_client.get(reverse(
+            'posts:group_unfollow', kwargs={'slug': self.group.slug}))
+        self.assertEqual(len(self.timeline()), 2)
+
+    def test_first_page_is_single_range_read(self):
+        """Первая страница ленты — один запрос без подсчёта записей."""
+        self.follow_author()
+        Post.objects.bulk_create(
+            Post(author=self.user_author, text=f'Пост {num}')
+            for num in range(settings.NUMBER_OF_ENTRIES + 2)
+        )
+        self.reader_client.get(reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': self.user_author.username}))
+        self.follow_author()
+        with CaptureQueriesContext(connection) as context:
+            response = self.reader_client.get(reverse('posts:follow_index'))
+        timeline_queries = [
+            query['sql'] for query in context.captured_queries
+            if 'posts_timelineentry' in query['sql']
+        ]
+        self.assertEqual(len(timeline_queries), 1)
+        self.assertNotIn('COUNT(', timeline_queries[0])
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), settings.NUMBER_OF_ENTRIES)
+        self.assertTrue(page_obj.has_next())
+        response = self.reader_client.get(
+            reverse('posts:follow_index'), {'cursor': page_obj.next_cursor})
+        self.assertEqual(len(response.context['page_obj']), 3)
+
+    def test_follow_button_state(self):
+        """Кнопка подписки на странице автора отражает подписку."""
+        url = reverse(
+            'posts:profile', kwargs={'username': self.user_author.username})
+        self.assertContains(self.reader_client.get(url), 'Подписаться')
+        self.follow_author()
+        self.assertContains(self.reader_client.get(url), 'Отписаться')
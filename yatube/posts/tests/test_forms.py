@@ -1,9 +1,13 @@
 from http import HTTPStatus
+from unittest import mock
 
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.db import OperationalError, connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+from ..forms import PostForm
 from ..models import Group, Post
 
 User = get_user_model()
@@ -108,3 +112,35 @@ class PostPagesTests(TestCase):
         self.assertEqual(edit_post.author.username, self.user_author.username)
         self.assertEqual(edit_post.text, form_data['text'])
         self.assertEqual(edit_post.group.id, form_data['group'])
+
+    @override_settings(DB_WRITE_RETRIES=2, DB_WRITE_RETRY_DELAY=0)
+    def test_post_edit_retries_only_the_write(self):
+        """При занятой базе повторяется только сохранение формы, запись
+        читается один раз."""
+        save = PostForm.save
+        calls = []
+
+        def locked_once(form, *args, **kwargs):
+            calls.append(1)
+            if len(calls) == 1:
+                raise OperationalError('database is locked')
+            return save(form, *args, **kwargs)
+
+        url = reverse('posts:post_edit', args=[self.post.id])
+        with mock.patch.object(PostForm, 'save', locked_once), \
+                CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.post(
+                url, {'text': 'Текст после повтора'})
+        self.assertRedirects(
+            response,
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+            fetch_redirect_response=False)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(
+            Post.objects.get(pk=self.post.pk).text, 'Текст после повтора')
+        self.assertEqual(len([
+            query for query in queries.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "posts_post"' in query['sql']
+            and 'INNER JOIN "auth_user"' in query['sql']
+        ]), 1)
@@ -0,0 +1,225 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import groups
+from ..models import Group, Post, PostCounter
+
+User = get_user_model()
+
+
+class GroupDirectoryTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тестовое название группы',
+            slug='test-slug',
+            description='Тестовое описание группы',
+        )
+        cls.empty_group = Group.objects.create(
+            title='Пустая группа',
+            slug='empty-slug',
+            description='Описание пустой группы',
+        )
+        cls.user_author = User.objects.create_user(username='user_author')
+        cls.posts = [
+            Post.objects.create(
+                text=f'Текст поста {num}',
+                author=cls.user_author,
+                group=cls.group,
+            )
+            for num in range(3)
+        ]
+
+    def setUp(self):
+        groups.invalidate()
+        self.guest_client = Client()
+
+    def test_directory_lists_groups(self):
+        """Каталог групп: число записей и дата последней записи."""
+        response = self.guest_client.get(reverse('posts:groups'))
+        self.assertTemplateUsed(response, 'posts/groups.html')
+        entries = {
+            entry['group'].slug: entry for entry in response.context['groups']
+        }
+        self.assertEqual(entries['test-slug']['count'], 3)
+        self.assertEqual(
+            entries['test-slug']['latest'], self.posts[-1].pub_date)
+        self.assertEqual(entries['empty-slug']['count'], 0)
+        self.assertIsNone(entries['empty-slug']['latest'])
+        self.assertContains(
+            response,
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}))
+
+    def test_directory_cost_does_not_grow_with_groups(self):
+        """Каталог без счётчиков и с ними стоит одинаковое число
+        запросов, сколько бы ни было групп."""
+        url = reverse('posts:groups')
+        with CaptureQueriesContext(connection) as cold:
+            self.guest_client.get(url)
+        Group.objects.bulk_create(
+            Group(title=f'Группа {num}', slug=f'group-{num}')
+            for num in range(10))
+        PostCounter.objects.all().delete()
+        groups.invalidate()
+        with CaptureQueriesContext(connection) as more_groups:
+            self.guest_client.get(url)
+        self.assertEqual(len(more_groups), len(cold))
+        self.assertEqual(PostCounter.objects.count(), 12)
+        with CaptureQueriesContext(connection) as warm:
+            self.guest_client.get(url)
+        self.assertLess(len(warm), len(cold))
+
+    @override_settings(GROUPS_PER_PAGE=1)
+    def test_directory_is_paginated(self):
+        """Каталог разбит на страницы."""
+        response = self.guest_client.get(reverse('posts:groups'))
+        self.assertEqual(len(response.context['groups']), 1)
+        self.assertEqual(response.context['page_obj'].paginator.num_pages, 2)
+        response = self.guest_client.get(reverse('posts:groups'), {'page': 2})
+        self.assertEqual(
+            response.context['groups'][0]['group'], self.group)
+
+    def test_new_post_updates_latest_date(self):
+        """Новая запись сразу меняет дату в каталоге."""
+        self.guest_client.get(reverse('posts:groups'))
+        post = Post.objects.create(
+            text='Новый пост', author=self.user_author,
+            group=self.empty_group)
+        with CaptureQueriesContext(connection) as queries:
+            latest = groups.latest_dates()
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(latest[self.empty_group.pk], post.pub_date)
+
+    def test_group_page_uses_cached_group(self):
+        """Страница группы не запрашивает группу из базы повторно."""
+        url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        self.guest_client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            response = self.guest_client.get(url)
+        self.assertEqual(response.context['group'], self.group)
+        self.assertFalse([
+            query for query in context.captured_queries
+            if 'FROM "posts_group"' in query['sql']
+        ])
+
+    def test_saving_group_invalidates_cache(self):
+        """Изменение группы сразу видно на её странице."""
+        url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        self.guest_client.get(url)
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Новое название'
+        group.save()
+        response = self.guest_client.get(url)
+        self.assertEqual(response.context['group'].title, 'Новое название')
+
+    def test_unknown_and_new_slugs(self):
+        """Неизвестный slug — 404, группа из другого процесса находится."""
+        groups.get_groups()
+        response = self.guest_client.get(
+            reverse('posts:group_list', kwargs={'slug': 'missing'}))
+        self.assertEqual(response.status_code, 404)
+        Group.objects.bulk_create([Group(
+            title='Новая группа', slug='new-slug', description='Описание')])
+        self.assertEqual(groups.get_group('new-slug').title, 'Новая группа')
+
+    @override_settings(GROUPS_CACHE_TIMEOUT=0)
+    def test_cache_expires(self):
+        """Изменения в обход сигналов видны по истечении срока кэша."""
+        groups.get_groups()
+        Group.objects.filter(pk=self.group.pk).update(title='Другое')
+        self.assertEqual(groups.get_group(self.group.slug).title, 'Другое')
+
+    def test_queries_run_outside_lock(self):
+        """Запросы к базе идут без блокировки кэша групп."""
+        held = []
+
+        def check_lock(execute, sql, params, many, context):
+            held.append(groups._lock.locked())
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(check_lock):
+            groups.get_groups()
+            groups.latest_dates()
+        self.assertEqual(held, [False, False])
+
+    def test_invalidate_during_load_is_kept(self):
+        """Загрузка, начатая до сброса кэша, не подменяет его."""
+        def invalidate(execute, sql, params, many, context):
+            groups.invalidate()
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(invalidate):
+            self.assertIn(self.group.slug, groups.get_groups())
+        self.assertIsNone(groups._groups)
+        groups.get_groups()
+        self.assertIsNotNone(groups._groups)
+
+
+class GroupAutocompleteTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.groups = Group.objects.bulk_create([
+            Group(title='Тестовая группа', slug='test-group',
+                  description='Описание'),
+            Group(title='Тестовая вторая', slug='second',
+                  description='Описание'),
+            Group(title='Котики', slug='cats', description='Описание'),
+        ])
+        cls.group = Group.objects.get(slug='cats')
+        cls.user_author = User.objects.create_user(username='user_author')
+        cls.post = Post.objects.create(
+            text='Текст поста', author=cls.user_author, group=cls.group)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user_author)
+
+    def autocomplete(self, query):
+        response = self.authorized_client.get(
+            reverse('posts:group_autocomplete'), {'q': query})
+        return [item['text'] for item in response.json()['results']]
+
+    def test_prefix_lookup(self):
+        """Группы ищутся по началу названия в любом регистре и по slug."""
+        cases = (
+            ('тест', ['Тестовая вторая', 'Тестовая группа']),
+            ('Тестовая г', ['Тестовая группа']),
+            ('cat', ['Котики']),
+            ('группа', []),
+            ('', ['Котики', 'Тестовая вторая', 'Тестовая группа']),
+        )
+        for query, titles in cases:
+            with self.subTest(query=query):
+                self.assertEqual(self.autocomplete(query), titles)
+
+    def test_form_renders_only_selected_group(self):
+        """В форме нет полного списка групп, только выбранная."""
+        cases = (
+            (reverse('posts:post_create'), []),
+            (reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
+             [self.group.title]),
+        )
+        for url, titles in cases:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertContains(
+                    response, reverse('posts:group_autocomplete'))
+                self.assertContains(response, 'Группа не выбрана')
+                for group in Group.objects.all():
+                    if group.title in titles:
+                        self.assertContains(response, group.title)
+                    else:
+                        self.assertNotContains(response, group.title)
+
+    def test_form_accepts_any_group(self):
+        """При сохранении выбранная группа ищется по id."""
+        group = Group.objects.get(slug='second')
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
+            {'text': 'Новый текст', 'group': group.pk})
+        self.assertEqual(Post.objects.get(pk=self.post.pk).group, group)
@@ -0,0 +1,137 @@
+import io
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.templatetags.static import static
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from .. import images
+from ..models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(name='photo.png', size=(2000, 1500), color='red'):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostImageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_author = User.objects.create_user(username='user_author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user_author)
+
+    def create_post(self, image):
+        self.authorized_client.post(reverse('posts:post_create'), {
+            'text': 'Запись с картинкой',
+            'image': image,
+        })
+        return Post.objects.latest('pk')
+
+    def test_upload_is_stored_by_content_hash(self):
+        """Одинаковые картинки хранятся одним файлом."""
+        first = self.create_post(make_image('first.png'))
+        second = self.create_post(make_image('second.PNG'))
+        other = self.create_post(make_image(color='blue'))
+        self.assertRegex(
+            first.image.name, r'^posts/[0-9a-f]{2}/[0-9a-f]{64}\.png$')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertNotEqual(first.image.name, other.image.name)
+        directory = os.path.dirname(first.image.path)
+        self.assertEqual(len(os.listdir(directory)), 1)
+
+    def test_make_variants(self):
+        """Копии создаются один раз нужных размеров."""
+        post = self.create_post(make_image())
+        self.assertEqual(
+            images.make_variants(post.image.name),
+            len(settings.POSTS_THUMBNAIL_SIZES))
+        self.assertEqual(images.make_variants(post.image.name), 0)
+        for size, (width, height, crop) in (
+                settings.POSTS_THUMBNAIL_SIZES.items()):
+            with self.subTest(size=size):
+                name = images.variant_name(post.image.name, size)
+                with images.storage.open(name) as file, \
+                        Image.open(file) as variant:
+                    if crop:
+                        self.assertEqual(variant.size, (width, height))
+                    else:
+                        self.assertLessEqual(variant.width, width)
+                        self.assertLessEqual(variant.height, height)
+
+    def test_worker(self):
+        """Фоновый поток готовит копии вне запроса."""
+        post = self.create_post(make_image(color='green'))
+        # Поток не видит транзакцию теста; сигнал проверяется отдельно.
+        with mock.patch.object(images.variants_created, 'send') as send:
+            images.worker.submit(post.image.name)
+            images.worker.join()
+        send.assert_called_once_with(sender=None, name=post.image.name)
+        self.assertTrue(images.storage.exists(
+            images.variant_name(post.image.name, 'feed')))
+
+    def test_feed_uses_variant(self):
+        """Лента ссылается на копию, а пока её нет — на заглушку, но
+        не на оригинал."""
+        post = self.create_post(make_image(color='yellow'))
+        url = reverse('posts:index')
+        response = self.client.get(url)
+        self.assertContains(response, static(images.PLACEHOLDER))
+        self.assertNotContains(response, post.image.url)
+        images.make_variants(post.image.name)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, post.feed_image_url)
+        self.assertNotEqual(post.feed_image_url, post.image.url)
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}))
+        self.assertContains(response, post.detail_image_url)
+
+    def test_ready_variants_are_not_checked_again(self):
+        """Готовая копия не ищется в хранилище при каждом рендеринге."""
+        post = self.create_post(make_image(color='purple'))
+        images.make_variants(post.image.name)
+        post.feed_image_url
+        with mock.patch.object(images.storage, 'exists') as exists:
+            self.assertEqual(post.feed_image_url, images.storage.url(
+                images.variant_name(post.image.name, 'feed')))
+        exists.assert_not_called()
+
+    def test_concurrent_save_of_same_content(self):
+        """Файл, появившийся между exists() и записью, не мешает
+        сохранению."""
+        name = 'posts/ab/same.png'
+        images.storage.save(name, ContentFile(b'content'))
+        with mock.patch.object(images.HashedStorage, 'exists',
+                               return_value=False):
+            saved = images.storage.save(name, ContentFile(b'content'))
+        self.assertEqual(saved, name)
+        with images.storage.open(name) as file:
+            self.assertEqual(file.read(), b'content')
+        self.assertEqual(
+            os.listdir(os.path.dirname(images.storage.path(name))),
+            ['same.png'])
@@ -0,0 +1,74 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN из SQLite')
+class FeedQueryPlanTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тестовое название группы',
+            slug='test-slug',
+            description='Тестовое описание группы',
+        )
+        cls.user_author = User.objects.create_user(username='user_author')
+        Post.objects.bulk_create(
+            Post(author=cls.user_author,
+                 text=f'Тестовый пост{num_post}',
+                 group=cls.group)
+            for num_post in range(15)
+        )
+
+    def setUp(self):
+        self.unauthorized_client = Client()
+
+    def feed_queries(self, url, data=None):
+        """SQL-запросы страницы, выбирающие записи ленты по порядку."""
+        with CaptureQueriesContext(connection) as context:
+            response = self.unauthorized_client.get(url, data)
+        return response, [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "posts_post"' in query['sql']
+            and 'ORDER BY' in query['sql']
+        ]
+
+    def query_plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def test_feed_queries_use_indexes(self):
+        """Запросы лент не сканируют таблицу и не сортируют во временном
+        B-дереве."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': self.user_author.username}),
+        )
+        for url in urls:
+            response, queries = self.feed_queries(url)
+            cursor = response.context['page_obj'].next_cursor
+            queries += self.feed_queries(url, {'cursor': cursor})[1]
+            self.assertEqual(len(queries), 2)
+            for sql in queries:
+                with self.subTest(url=url, sql=sql):
+                    plan = self.query_plan(sql)
+                    self.assertFalse(
+                        [step for step in plan if 'TEMP B-TREE' in step],
+                        plan)
+                    self.assertFalse(
+                        [step for step in plan
+                         if step.startswith('SCAN') and 'INDEX' not in step],
+                        plan)
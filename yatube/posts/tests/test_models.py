@@ -1,7 +1,9 @@
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
-from ..models import Group, Post
+from ..models import EXCERPT_WORDS, Group, Post
 
 User = get_user_model()
 
@@ -60,3 +62,43 @@ class PostModelTest(TestCase):
             with self.subTest(value=value):
                 self.assertEqual(
                     args._meta.get_field(value).help_text, expected)
+
+
+class PostExcerptTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.long_text = ' '.join(
+            f'слово{num}' for num in range(EXCERPT_WORDS * 2))
+
+    def test_excerpt_on_save(self):
+        """Начало текста обновляется при сохранении записи."""
+        post = Post.objects.create(author=self.user, text='Короткий текст')
+        self.assertEqual(post.excerpt, 'Короткий текст')
+        post.text = self.long_text
+        post.save(update_fields=['text'])
+        post.refresh_from_db()
+        self.assertEqual(
+            post.excerpt.split(),
+            self.long_text.split()[:EXCERPT_WORDS] + ['…'])
+
+    def test_excerpt_on_bulk_create(self):
+        """bulk_create тоже заполняет начало текста."""
+        Post.objects.bulk_create(
+            Post(author=self.user, text=self.long_text) for _ in range(2))
+        for excerpt in Post.objects.values_list('excerpt', flat=True):
+            with self.subTest(excerpt=excerpt):
+                self.assertTrue(excerpt.startswith('слово0 '))
+                self.assertTrue(excerpt.endswith(' …'))
+
+    def test_feed_does_not_load_text(self):
+        """Ленты не читают полный текст записи."""
+        Post.objects.create(author=self.user, text=self.long_text)
+        with CaptureQueriesContext(connection) as queries:
+            posts = list(Post.objects.feed('author', 'group'))
+            posts[0].author.get_full_name()
+            posts[0].excerpt
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"posts_post"."text"', queries[0]['sql'])
+        self.assertIn('text', posts[0].get_deferred_fields())
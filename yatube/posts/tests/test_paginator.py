@@ -2,10 +2,11 @@ from math import ceil
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.test import Client, SimpleTestCase, TestCase, override_settings
 from django.urls import reverse
 
 from ..models import Group, Post
+from ..pagination import ElidedPaginator
 
 User = get_user_model()
 
@@ -58,3 +59,64 @@ class PaginatorCountTests(TestCase):
                     len(response.context['page_obj']),
                     settings.NUMBER_OF_ENTRIES
                 )
+
+    def test_cursor_paginator(self):
+        """Проверка перехода по страницам ленты через курсор."""
+        url = reverse('posts:index')
+        response = self.unauthorized_client.get(url)
+        first_page = list(response.context['page_obj'])
+        seen = list(first_page)
+        page_obj = response.context['page_obj']
+        while page_obj.has_next():
+            response = self.unauthorized_client.get(
+                url, {'cursor': page_obj.next_cursor}
+            )
+            page_obj = response.context['page_obj']
+            self.assertTrue(page_obj.is_cursor)
+            seen.extend(page_obj)
+        self.assertEqual(len(seen), self.ALL_POST_COUNT)
+        self.assertEqual(seen, list(Post.objects.all()))
+        response = self.unauthorized_client.get(
+            url, {'cursor': page_obj.previous_cursor}
+        )
+        self.assertEqual(list(response.context['page_obj']), first_page)
+
+    def test_cursor_paginator_bad_cursor(self):
+        """Некорректный курсор открывает первую страницу."""
+        response = self.unauthorized_client.get(
+            reverse('posts:index'), {'cursor': 'не-курсор'}
+        )
+        self.assertEqual(response.context['page_obj'].number, 1)
+
+    @override_settings(NUMBER_OF_ENTRIES=1)
+    def test_elided_page_links(self):
+        """Ссылок на страницы немного, сколько бы страниц ни было."""
+        response = self.unauthorized_client.get(
+            reverse('posts:index'), {'page': 8})
+        self.assertEqual(
+            list(response.context['page_obj'].elided_page_range),
+            [1, 2, '…', 5, 6, 7, 8, 9, 10, 11, '…', 15, 16])
+        self.assertContains(response, '<span class="page-link">…</span>',
+                            count=2, html=True)
+        self.assertNotContains(response, '?page=13"')
+
+
+class ElidedPageRangeTests(SimpleTestCase):
+    def test_elided_page_range(self):
+        """Сокращённый список страниц: края, соседи текущей, многоточия."""
+        paginator = ElidedPaginator(range(500000), 10)
+        ellipsis = ElidedPaginator.ELLIPSIS
+        cases = {
+            1: [1, 2, 3, 4, ellipsis, 49999, 50000],
+            6: [1, 2, 3, 4, 5, 6, 7, 8, 9, ellipsis, 49999, 50000],
+            25000: [1, 2, ellipsis, 24997, 24998, 24999, 25000, 25001,
+                    25002, 25003, ellipsis, 49999, 50000],
+            50000: [1, 2, ellipsis, 49997, 49998, 49999, 50000],
+        }
+        for number, expected in cases.items():
+            with self.subTest(number=number):
+                self.assertEqual(
+                    list(paginator.get_elided_page_range(number)), expected)
+        self.assertEqual(
+            list(ElidedPaginator(range(30), 10).get_elided_page_range(2)),
+            [1, 2, 3])
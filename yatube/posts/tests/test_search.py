@@ -0,0 +1,97 @@
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Индекс FTS5 есть только в SQLite')
+class PostSearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_author = User.objects.create_user(username='user_author')
+        cls.post = Post.objects.create(
+            text='Лисица <b>прыгает</b> через ленивую собаку',
+            author=cls.user_author,
+        )
+        cls.another_post = Post.objects.create(
+            text='Лисица лисица лисица спит',
+            author=cls.user_author,
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def search(self, query, **params):
+        return self.guest_client.get(
+            reverse('posts:search'), {'q': query, **params})
+
+    def test_search_ranks_and_highlights(self):
+        """Поиск ранжирует записи и подсвечивает найденное."""
+        response = self.search('ЛИСИЦА')
+        page_obj = response.context['page_obj']
+        self.assertEqual(list(page_obj), [self.another_post, self.post])
+        self.assertIn('<mark>Лисица</mark>', page_obj[1].snippet)
+        self.assertContains(response, '&lt;b&gt;прыгает&lt;/b&gt;')
+
+    def test_search_requires_all_terms(self):
+        """Все слова запроса должны встречаться в записи."""
+        page_obj = self.search('лисица собаку').context['page_obj']
+        self.assertEqual(list(page_obj), [self.post])
+
+    def test_search_index_follows_edits(self):
+        """Индекс обновляется при правке и удалении записи."""
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Совсем другой текст'
+        post.save()
+        self.assertEqual(
+            list(self.search('другой').context['page_obj']), [post])
+        self.assertEqual(
+            list(self.search('собаку').context['page_obj']), [])
+        post.delete()
+        self.assertEqual(
+            list(self.search('другой').context['page_obj']), [])
+
+    def test_search_ignores_query_syntax(self):
+        """Служебные символы FTS5 в запросе не приводят к ошибке."""
+        for query in ('"', 'NEAR(лисица', '*', 'лисица OR'):
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query).status_code, 200)
+
+    def test_search_pagination(self):
+        """Результаты поиска разбиты на страницы с сохранением запроса."""
+        Post.objects.bulk_create(
+            Post(author=self.user_author, text=f'Общий пост {num}')
+            for num in range(settings.NUMBER_OF_ENTRIES + 3)
+        )
+        response = self.search('общий')
+        self.assertEqual(
+            len(response.context['page_obj']), settings.NUMBER_OF_ENTRIES)
+        self.assertContains(response, '?q=%D0%BE%D0%B1%D1%89%D0%B8%D0%B9'
+                                      '&amp;page=2')
+        response = self.search('общий', page=2)
+        self.assertEqual(len(response.context['page_obj']), 3)
+
+    @override_settings(SEARCH_MAX_RESULTS=5)
+    def test_search_ranks_only_newest_matches(self):
+        """Ранжируются и считаются только самые новые совпадения."""
+        Post.objects.bulk_create(
+            Post(author=self.user_author, text=f'Частое слово {num}')
+            for num in range(8)
+        )
+        newest = Post.objects.order_by('-pk')[:5]
+        response = self.search('частое')
+        self.assertEqual(response.context['page_obj'].paginator.count, 5)
+        self.assertEqual(
+            {post.pk for post in response.context['page_obj']},
+            {post.pk for post in newest})
+        self.assertContains(response, 'Найдено записей: больше 5')
+        response = self.search('лисица')
+        self.assertContains(response, 'Найдено записей: 2')
@@ -0,0 +1,101 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Follow, Group, Post, PostCounter
+from ..writes import GroupCommit, flush_posts, group_commit
+
+User = get_user_model()
+
+
+@override_settings(POSTS_WRITE_BATCH_SIZE=5, POSTS_WRITE_BATCH_DELAY=5)
+class GroupCommitTests(SimpleTestCase):
+    def submit_all(self, commit, items):
+        errors = []
+
+        def submit(item):
+            try:
+                commit.submit(item)
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=submit, args=(item,))
+                   for item in items]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=2)
+            self.assertFalse(thread.is_alive())
+        return errors
+
+    def test_full_batch_is_flushed_at_once(self):
+        """Полная пачка сохраняется сразу, не дожидаясь задержки."""
+        flushed = []
+        commit = GroupCommit(lambda items: flushed.append(list(items)))
+        self.assertEqual(self.submit_all(commit, range(5)), [])
+        self.assertEqual([sorted(batch) for batch in flushed],
+                         [[0, 1, 2, 3, 4]])
+        stats = commit.stats()
+        self.assertEqual(stats['queue_depth'], 0)
+        self.assertEqual(stats['max_queue_depth'], 5)
+        self.assertEqual(stats['batches'], 1)
+        self.assertEqual(stats['flush_ms']['count'], 1)
+
+    def test_error_reaches_every_writer(self):
+        """Ошибка сохранения пачки получает каждый её запрос."""
+        def flush(items):
+            raise RuntimeError('disk full')
+
+        commit = GroupCommit(flush)
+        errors = self.submit_all(commit, range(5))
+        self.assertEqual(len(errors), 5)
+        self.assertEqual(commit.stats()['errors'], 1)
+
+
+class WriteBehindTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тестовое название группы',
+            slug='test-slug',
+            description='Тестовое описание группы',
+        )
+        cls.user_author = User.objects.create_user(username='user_author')
+        cls.user_follower = User.objects.create_user(username='follower')
+        Follow.objects.create(user=cls.user_follower, group=cls.group)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user_author)
+
+    def test_flush_posts_runs_post_save(self):
+        """Записи из пачки получают id, счётчики и ленты подписчиков."""
+        index = PostCounter.objects.get_counter(
+            PostCounter.INDEX, Post.objects.all())
+        posts = [
+            Post(text=f'Текст {num}', author=self.user_author,
+                 group=self.group)
+            for num in range(3)
+        ]
+        flush_posts(posts)
+        self.assertEqual(
+            [post.pk for post in posts],
+            list(Post.objects.order_by('pk').values_list('pk', flat=True)))
+        index.refresh_from_db()
+        self.assertEqual(index.count, 3)
+        self.assertEqual(self.user_follower.timeline.count(), 3)
+
+    @override_settings(POSTS_WRITE_BEHIND=True, POSTS_WRITE_BATCH_DELAY=0)
+    def test_create_in_write_behind_mode(self):
+        """Запись сохранена к моменту перенаправления в профиль."""
+        batches = group_commit.stats()['batches']
+        response = self.authorized_client.post(
+            reverse('posts:post_create'),
+            {'text': 'Новая запись', 'group': self.group.pk})
+        self.assertRedirects(response, reverse(
+            'posts:profile', kwargs={'username': self.user_author.username}))
+        self.assertTrue(Post.objects.filter(text='Новая запись').exists())
+        self.assertEqual(group_commit.stats()['batches'], batches + 1)
@@ -0,0 +1,98 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Q
+
+from .models import Follow, Post, TimelineEntry
+
+
+def followers(post):
+    """Пользователи, в ленты которых попадает запись."""
+    subscriptions = Q(author_id=post.author_id)
+    if post.group_id is not None:
+        subscriptions |= Q(group_id=post.group_id)
+    return Follow.objects.filter(subscriptions).values('user_id').distinct()
+
+
+def fan_out(post):
+    """Раскладывает запись по лентам подписчиков автора и группы."""
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=follow['user_id'], post_id=post.pk,
+                       pub_date=post.pub_date)
+         for follow in followers(post).iterator()),
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def fan_out_after(last_pk):
+    """Раскладывает по лентам записи с pk больше last_pk — созданные
+    через bulk_create без post_save. Возвращает новый наибольший pk.
+
+    Записи, которые уже разложены сигналом, пропускаются по
+    ограничению уникальности.
+    """
+    posts = list(
+        Post.objects.filter(pk__gt=last_pk).order_by('pk')
+        .values_list('pk', 'author_id', 'group_id', 'pub_date')
+    )
+    if not posts:
+        return last_pk
+    authors = {author_id for _, author_id, _, _ in posts}
+    groups = {group_id for _, _, group_id, _ in posts} - {None}
+    by_author, by_group = defaultdict(set), defaultdict(set)
+    for user_id, author_id, group_id in Follow.objects.filter(
+            Q(author_id__in=authors) | Q(group_id__in=groups)
+    ).values_list('user_id', 'author_id', 'group_id').iterator():
+        if author_id is not None:
+            by_author[author_id].add(user_id)
+        else:
+            by_group[group_id].add(user_id)
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+         for pk, author_id, group_id, pub_date in posts
+         for user_id in by_author[author_id] | by_group[group_id]),
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    return posts[-1][0]
+
+
+def resync(post):
+    """Приводит ленты в соответствие с подписками после смены группы."""
+    TimelineEntry.objects.filter(post_id=post.pk).exclude(
+        user_id__in=followers(post)).delete()
+    fan_out(post)
+
+
+def backfill(follow):
+    """Добавляет в ленту новые подписки последние записи автора или
+    группы."""
+    if follow.author_id is not None:
+        post_list = Post.objects.filter(author_id=follow.author_id)
+    else:
+        post_list = Post.objects.filter(group_id=follow.group_id)
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=follow.user_id, post_id=pk,
+                       pub_date=pub_date)
+         for pk, pub_date in post_list.values_list('pk', 'pub_date')[
+             :settings.TIMELINE_BACKFILL]),
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def prune(follow):
+    """Убирает из ленты записи отменённой подписки, если их не приносит
+    другая подписка пользователя."""
+    subscriptions = Follow.objects.filter(user_id=follow.user_id)
+    entries = TimelineEntry.objects.filter(user_id=follow.user_id)
+    if follow.author_id is not None:
+        entries = entries.filter(post__author_id=follow.author_id).exclude(
+            post__group_id__in=subscriptions.filter(
+                group__isnull=False).values('group_id'))
+    else:
+        entries = entries.filter(post__group_id=follow.group_id).exclude(
+            post__author_id__in=subscriptions.filter(
+                author__isnull=False).values('author_id'))
+    entries.delete()
@@ -1,66 +1,196 @@
 from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render, redirect
 
+from core.anonymous import public_for_anonymous
+from core.db import retry_on_locked
+
+from . import cache, export, groups, writes
 from .forms import PostForm
-from .models import Group, Post, User
+from .models import Follow, Group, Post, PostCounter, User
+from .pagination import CursorPaginator, ElidedPaginator
+from .search import search_posts
+
+
+def paginator(request, post_list, count=None):
+    posts = CursorPaginator(
+        post_list, settings.NUMBER_OF_ENTRIES, count=count)
+    cursor = request.GET.get('cursor')
+    if cursor:
+        return posts.get_cursor_page(cursor)
+    return posts.get_page(request.GET.get('page'))
 
 
-def paginator(page_number, post_list):
-    post = Paginator(post_list, settings.NUMBER_OF_ENTRIES)
-    page_obj = post.get_page(page_number)
-    return page_obj
+def is_following(user, **target):
+    if not user.is_authenticated:
+        return False
+    return Follow.objects.filter(user=user, **target).exists()
 
 
+@public_for_anonymous
 def index(request):
-    post_list = Post.objects.select_related('author', 'group')
-    context = {
-        'page_obj': paginator(request.GET.get('page'), post_list),
+    post_list = Post.objects.feed('author', 'group')
+    counter = PostCounter.objects.get_counter(PostCounter.INDEX, post_list)
+    return cache.render_feed(request, 'posts/index.html', counter, lambda: {
+        'page_obj': paginator(request, post_list, counter.count),
         'title': 'Последние обновления на сайте',
-    }
-    return render(request, 'posts/index.html', context)
+    })
 
 
-def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.select_related('author')
-    context = {
-        'group': group,
-        'page_obj': paginator(request.GET.get('page'), post_list),
-    }
-    return render(request, 'posts/group_list.html', context, )
+def group_index(request):
+    page_obj = ElidedPaginator(
+        list(groups.get_groups().values()), settings.GROUPS_PER_PAGE,
+    ).get_page(request.GET.get('page'))
+    return render(request, 'posts/groups.html', {
+        'page_obj': page_obj,
+        'groups': groups.directory(page_obj.object_list),
+    })
+
 
+def group_autocomplete(request):
+    return JsonResponse({'results': [
+        {'id': pk, 'text': title}
+        for pk, title in groups.autocomplete(request.GET.get('q', ''))
+    ]})
 
+
+@public_for_anonymous
+def group_posts(request, slug):
+    group = groups.get_group(slug)
+    if group is None:
+        raise Http404('Группа не найдена')
+    post_list = group.posts.feed('author')
+    counter = PostCounter.objects.get_counter(
+        PostCounter.group_key(group.pk), post_list)
+    following = is_following(request.user, group=group)
+    return cache.render_feed(
+        request, 'posts/group_list.html', counter, lambda: {
+            'group': group,
+            'page_obj': paginator(request, post_list, counter.count),
+            'following': following,
+        }, str(following))
+
+
+@public_for_anonymous
 def profile(request, username):
     user = get_object_or_404(User, username=username)
-    post_list = user.posts.select_related('group')
-    context = {
-        'page_obj': paginator(request.GET.get('page'), post_list),
-        'count_post': post_list.count,
-        'author': user,
-    }
-    return render(request, 'posts/profile.html', context)
+    post_list = user.posts.feed('group')
+    counter = PostCounter.objects.get_counter(
+        PostCounter.author_key(user.pk), post_list)
+    following = is_following(request.user, author=user)
+    return cache.render_feed(
+        request, 'posts/profile.html', counter, lambda: {
+            'page_obj': paginator(request, post_list, counter.count),
+            'count_post': counter.count,
+            'author': user,
+            'following': following,
+        }, str(following))
 
 
+@login_required
+def profile_export(request, username):
+    """Все записи автора одним файлом JSONL или CSV, при ?gzip=1 — сжатым.
+
+    Записи читаются серверным курсором порциями и сразу уходят клиенту,
+    поэтому память не зависит от числа записей.
+    """
+    author = get_object_or_404(User, username=username)
+    if request.user != author:
+        return redirect('posts:profile', username=username)
+    file_format = request.GET.get('format')
+    if file_format not in export.FORMATS:
+        file_format = export.FORMATS[0]
+    blocks = export.encode_blocks(export.serialize(
+        export.post_rows(author.posts.all()), file_format))
+    filename = f'{author.username}-posts.{file_format}'
+    if request.GET.get('gzip'):
+        response = StreamingHttpResponse(
+            export.gzip_blocks(blocks), content_type='application/gzip')
+        filename += '.gz'
+    else:
+        response = StreamingHttpResponse(
+            blocks, content_type=export.CONTENT_TYPES[file_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@public_for_anonymous
 def post_detail(request, post_id):
     post = get_object_or_404(
         Post.objects.select_related('author', 'group'), pk=post_id
     )
+    counter = PostCounter.objects.get_counter(
+        PostCounter.author_key(post.author_id), post.author.posts)
+    return cache.render_post(
+        request, 'posts/post_detail.html', post, counter, lambda: {
+            'post': post,
+            'count_post': counter.count,
+        })
+
+
+@login_required
+def follow_index(request):
+    entries = request.user.timeline.select_related(
+        'post__author', 'post__group')
+    timeline = CursorPaginator(entries, settings.NUMBER_OF_ENTRIES)
+    cursor = request.GET.get('cursor')
+    if cursor:
+        page_obj = timeline.get_cursor_page(cursor)
+    else:
+        page_obj = timeline.get_first_page()
+    return render(request, 'posts/follow.html', {'page_obj': page_obj})
+
+
+@login_required
+def profile_follow(request, username):
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        Follow.objects.get_or_create(user=request.user, author=author)
+    return redirect('posts:profile', username=username)
+
+
+@login_required
+def profile_unfollow(request, username):
+    author = get_object_or_404(User, username=username)
+    for follow in Follow.objects.filter(user=request.user, author=author):
+        follow.delete()
+    return redirect('posts:profile', username=username)
+
+
+@login_required
+def group_follow(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    Follow.objects.get_or_create(user=request.user, group=group)
+    return redirect('posts:group_list', slug=slug)
+
+
+@login_required
+def group_unfollow(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    for follow in Follow.objects.filter(user=request.user, group=group):
+        follow.delete()
+    return redirect('posts:group_list', slug=slug)
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    results = ElidedPaginator(search_posts(query), settings.NUMBER_OF_ENTRIES)
     context = {
-        'post': post,
-        'count_post': post.author.posts.count(),
+        'page_obj': results.get_page(request.GET.get('page')),
+        'query': query,
     }
-    return render(request, 'posts/post_detail.html', context)
+    return render(request, 'posts/search.html', context)
 
 
 @login_required
 def post_create(request):
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
-        post.save()
+        writes.save_post(post)
         return redirect('posts:profile', username=post.author)
 
     return render(request, 'posts/create_post.html', {'form': form})
@@ -69,13 +199,26 @@ def post_create(request):
 @login_required
 def post_edit(request, post_id):
     post = get_object_or_404(Post.objects.select_related('author'), pk=post_id)
-    form = PostForm(request.POST or None, instance=post)
+    form = PostForm(
+        request.POST or None, files=request.FILES or None, instance=post)
     if request.user == post.author:
         if form.is_valid():
-            form.save()
+            # Повторяется только запись: чтение и рендеринг формы вне
+            # транзакции.
+            retry_on_locked(form.save)()
             return redirect('posts:post_detail', post_id=post_id)
 
         return render(request, 'posts/create_post.html',
                       {'form': form, 'is_edit': True})
 
     return redirect('posts:post_detail', post_id=post_id)
+
+
+@staff_member_required
+def cache_stats(request):
+    return JsonResponse(cache.stats())
+
+
+@staff_member_required
+def write_stats(request):
+    return JsonResponse(writes.group_commit.stats())
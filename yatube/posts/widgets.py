@@ -0,0 +1,47 @@
+from django import forms
+from django.urls import reverse
+
+
+class AutocompleteSelect(forms.Select):
+    """<select> только с выбранным вариантом.
+
+    Остальные варианты скрипт posts/js/autocomplete.js подгружает по
+    мере ввода из url_name, поэтому страница не зависит от числа строк
+    в queryset поля.
+    """
+
+    url_name = 'posts:group_autocomplete'
+
+    class Media:
+        js = ('posts/js/autocomplete.js',)
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs']['data-autocomplete-url'] = reverse(
+            self.url_name)
+        return context
+
+    def selected_choices(self, value):
+        field = self.choices.field
+        choices = []
+        if field.empty_label is not None:
+            choices.append(('', field.empty_label))
+        pks = [pk for pk in value if pk]
+        if pks:
+            try:
+                selected = list(field.queryset.filter(pk__in=pks))
+            except (TypeError, ValueError):
+                selected = []
+            choices.extend(
+                (field.prepare_value(obj), field.label_from_instance(obj))
+                for obj in selected
+            )
+        return choices
+
+    def optgroups(self, name, value, attrs=None):
+        iterator = self.choices
+        self.choices = self.selected_choices(value)
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = iterator
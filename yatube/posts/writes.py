@@ -0,0 +1,131 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Max
+from django.db.models.signals import post_save
+
+from core.db import note_write, retry_on_locked
+from core.instrumentation import MS_BOUNDS, Histogram
+
+from .models import Post
+
+
+class Batch:
+    def __init__(self):
+        self.items = []
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.error = None
+
+
+class GroupCommit:
+    """Групповая запись: одновременные запросы сохраняют свои объекты
+    одной транзакцией.
+
+    Первый запрос пачки становится ведущим: он ждёт до
+    POSTS_WRITE_BATCH_DELAY секунд или пока пачка не наберёт
+    POSTS_WRITE_BATCH_SIZE объектов, сохраняет её через flush и будит
+    остальных. Каждый запрос возвращается только после фиксации своей
+    пачки, фоновых потоков нет.
+    """
+
+    def __init__(self, flush):
+        self.flush = flush
+        self.lock = threading.Lock()
+        self.batch = None
+        self.depth = 0
+        self.max_depth = 0
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+        self.latency = Histogram(MS_BOUNDS)
+
+    def submit(self, item):
+        with self.lock:
+            batch = self.batch
+            leader = batch is None
+            if leader:
+                batch = self.batch = Batch()
+            batch.items.append(item)
+            self.depth += 1
+            self.max_depth = max(self.max_depth, self.depth)
+            if len(batch.items) >= settings.POSTS_WRITE_BATCH_SIZE:
+                # Полная пачка закрыта, следующие запросы начнут новую.
+                self.batch = None
+                batch.full.set()
+        if leader:
+            self.lead(batch)
+        else:
+            batch.done.wait()
+        if batch.error is not None:
+            raise batch.error
+
+    def lead(self, batch):
+        batch.full.wait(settings.POSTS_WRITE_BATCH_DELAY)
+        with self.lock:
+            if self.batch is batch:
+                self.batch = None
+        started = time.perf_counter()
+        try:
+            self.flush(batch.items)
+        except Exception as error:
+            batch.error = error
+        finally:
+            with self.lock:
+                self.depth -= len(batch.items)
+                self.batches += 1
+                self.items += len(batch.items)
+                self.errors += batch.error is not None
+                self.latency.add((time.perf_counter() - started) * 1000)
+            batch.done.set()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'queue_depth': self.depth,
+                'max_queue_depth': self.max_depth,
+                'batches': self.batches,
+                'items': self.items,
+                'errors': self.errors,
+                'flush_ms': self.latency.as_dict(),
+            }
+
+
+@retry_on_locked
+def flush_posts(posts):
+    """Сохраняет записи одним bulk_create и рассылает post_save, чтобы
+    счётчики лент и ленты подписчиков обновились как при save()."""
+    db = connections[router.db_for_write(Post)]
+    if db.vendor != 'sqlite' and not (
+            db.features.can_return_rows_from_bulk_insert):
+        for post in posts:
+            post.save(using=db.alias)
+        return
+    Post.objects.using(db.alias).bulk_create(posts)
+    if posts[-1].pk is None:
+        # SQLite не возвращает id из bulk_create, но внутри транзакции
+        # выдаёт вставленным строкам подряд идущие rowid.
+        last = Post.objects.using(db.alias).aggregate(
+            last=Max('pk'))['last']
+        for pk, post in enumerate(posts, last - len(posts) + 1):
+            post.pk = pk
+    for post in posts:
+        post_save.send(
+            sender=Post, instance=post, created=True, update_fields=None,
+            raw=False, using=db.alias)
+
+
+group_commit = GroupCommit(flush_posts)
+
+
+def save_post(post):
+    """Сохраняет новую запись: сразу или, в режиме POSTS_WRITE_BEHIND,
+    в пачке с одновременными запросами."""
+    if settings.POSTS_WRITE_BEHIND:
+        group_commit.submit(post)
+        # Пачку могла записать другая нить, а клиенту нужна основная база.
+        note_write()
+    else:
+        retry_on_locked(post.save)()
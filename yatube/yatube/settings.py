@@ -31,6 +31,10 @@ ALLOWED_HOSTS = [
     'testserver',
 ]
 
+INTERNAL_IPS = [
+    '127.0.0.1',
+]
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -47,6 +51,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestStatsMiddleware',
+    'core.middleware.AnonymousCacheMiddleware',
+    'core.middleware.PrimaryPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -58,12 +65,19 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'yatube.urls'
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.instrumentation.InstrumentedDjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': [
+                ('core.instrumentation.TimedLoader', TEMPLATE_LOADERS),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -74,7 +88,14 @@ TEMPLATES = [
     },
 ]
 
+FORM_RENDERER = 'core.templates.CachedFormRenderer'
+
+# Загрузить и скомпилировать все шаблоны при старте, см. core.templates.
+TEMPLATE_WARMUP = False
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
+# Потоки, в которых yatube.asgi выполняет запросы.
+ASGI_THREADS = 8
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
@@ -86,6 +107,69 @@ DATABASES = {
     }
 }
 
+# Реплики для чтения: файлы SQLite через запятую в YATUBE_REPLICAS,
+# обновляются командой sync_replicas. В тестах зеркалируют default.
+DATABASE_REPLICAS = []
+for number, name in enumerate(
+        filter(None, os.environ.get('YATUBE_REPLICAS', '').split(',')), 1):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+# PRAGMA для каждого нового соединения SQLite, см. settings_production.
+SQLITE_PRAGMAS = {}
+# Повторы записи при «database is locked»: число и первая пауза в секундах.
+DB_WRITE_RETRIES = 3
+DB_WRITE_RETRY_DELAY = 0.05
+
+DATABASE_ROUTERS = ['core.db.ReplicaRouter']
+# Реплика, скопированная раньше чем столько секунд назад, не читается.
+# Столько же после записи живёт cookie с её временем, см.
+# core.middleware.PrimaryPinMiddleware.
+REPLICA_MAX_LAG = 60
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'yatube',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+    },
+    # Общий для процессов: выход из сессии виден всем сразу.
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'sessions'),
+        'OPTIONS': {
+            # При переполнении кэш удаляет треть сессий, и они снова
+            # читаются из базы: лимит — с запасом на число живых сессий.
+            'MAX_ENTRIES': 100000,
+        },
+    },
+}
+
+# Сессии читаются из кэша, в базу идут только при записи и промахе.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'sessions'
+
+# Пользователи сессий кэшируются в памяти процесса, см. core.auth.
+# ModelBackend остаётся для сессий, открытых до появления CachedModelBackend.
+AUTHENTICATION_BACKENDS = [
+    'core.auth.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+AUTH_USER_CACHE_TIMEOUT = 30
+# Общий кэш, через который процессы узнают о смене пароля, выходе и
+# деактивации пользователя раньше AUTH_USER_CACHE_TIMEOUT.
+AUTH_USER_CACHE_ALIAS = 'sessions'
+
+# Кэш сессий в тестах держится в памяти, см. core.runner.
+TEST_RUNNER = 'core.runner.TestRunner'
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -123,7 +207,46 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
 NUMBER_OF_ENTRIES: int = 10
+# Сколько самых новых совпадений поиск ранжирует и показывает.
+SEARCH_MAX_RESULTS = 1000
+
+# Кэш готовых страниц лент: алиас из CACHES ('default' или 'file').
+POSTS_CACHE_ALIAS = 'default'
+POSTS_CACHE_TIMEOUT = 60 * 5
+POSTS_PAGE_CACHE = False
+# Групповая запись новых постов, см. posts.writes: пачка ждёт не дольше
+# POSTS_WRITE_BATCH_DELAY секунд и не больше POSTS_WRITE_BATCH_SIZE записей.
+POSTS_WRITE_BEHIND = False
+POSTS_WRITE_BATCH_SIZE = 50
+POSTS_WRITE_BATCH_DELAY = 0.01
+# Копии картинок записей: имя -> (ширина, высота, обрезать до размера).
+# Готовятся в фоновом потоке, см. posts.images.
+POSTS_THUMBNAIL_SIZES = {
+    'feed': (960, 339, True),
+    'detail': (1280, 1280, False),
+}
+POSTS_THUMBNAILS_ASYNC = True
+# Сколько секунд прокси и AnonymousCacheMiddleware хранят страницы для
+# анонимных посетителей (max-age в Cache-Control) и сколько страниц
+# держит процесс. 0 — хранить нельзя, только перепроверять по ETag.
+ANONYMOUS_CACHE_TIMEOUT = 0
+ANONYMOUS_CACHE_SIZE = 1000
+# Сколько секунд процесс держит группы в памяти и сколько групп
+# на странице каталога, см. posts.groups.
+GROUPS_CACHE_TIMEOUT = 60
+GROUPS_PER_PAGE = 50
+
+# Лента подписок: сколько последних записей добавлять при подписке
+# и размер пачки при раскладке записи по лентам подписчиков.
+TIMELINE_BACKFILL = 200
+TIMELINE_BATCH_SIZE = 1000
+
+# Доля запросов, для которых RequestStatsMiddleware собирает замеры.
+REQUEST_STATS_SAMPLE_RATE = 1.0 if DEBUG else 0.01
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
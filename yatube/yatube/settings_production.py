@@ -0,0 +1,43 @@
+"""
+Профиль для работы под нагрузкой на SQLite.
+
+    DJANGO_SETTINGS_MODULE=yatube.settings_production
+"""
+
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES, SECRET_KEY, TEMPLATE_LOADERS, TEMPLATES
+
+SECRET_KEY = os.environ.get('YATUBE_SECRET_KEY', SECRET_KEY)
+
+DEBUG = False
+
+# Соединение живёт между запросами, PRAGMA применяются один раз.
+for database in DATABASES.values():
+    database['CONN_MAX_AGE'] = 600
+
+SQLITE_PRAGMAS = {
+    # Читатели не ждут писателя и видят последний снимок базы.
+    'journal_mode': 'WAL',
+    # В режиме WAL fsync нужен только при checkpoint.
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение — размер кэша страниц в КиБ.
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+    # Сколько миллисекунд писатель ждёт освобождения блокировки.
+    'busy_timeout': 5000,
+}
+
+# Шаблоны читаются и компилируются один раз на процесс, при старте.
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('core.instrumentation.TimedLoader', [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]),
+]
+TEMPLATE_WARMUP = True
+
+POSTS_PAGE_CACHE = True
+ANONYMOUS_CACHE_TIMEOUT = 10
+REQUEST_STATS_SAMPLE_RATE = 0.01